@@ -0,0 +1,18 @@
+# Settings for 'manage.py runBenchmarks': the normal settings against a local SQLite file, with request profiling
+# off so it doesn't add to the timings, and caches of their own so the runs never touch the server's
+from .settings import *
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'benchmark.sqlite3',
+    }
+}
+
+PROFILING_ENABLED = False
+
+# Same file-based backends as the server, in their own directories: the runs clear them between timed requests
+CACHES = {
+    'default': dict(CACHES['default'], LOCATION=BASE_DIR / 'benchmarkCache'),
+    'sessions': dict(CACHES['sessions'], LOCATION=BASE_DIR / 'benchmarkSessionCache'),
+}
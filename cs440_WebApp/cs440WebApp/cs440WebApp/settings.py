@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -58,10 +59,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'website.middleware.ProfilingMiddleware',  # Per-view timing and query counts (first, so it sees every query)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'website.middleware.RoleMiddleware',  # request.role, cached in the session (after auth)
     'django.contrib.messages.middleware.MessageMiddleware',
     'website.middleware.SecurityMiddleware',  # Custom security middleware (after auth)
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -103,10 +106,28 @@ DATABASES = {
             'read_timeout': 60,
             'write_timeout': 60,
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
-        }
+        },
+        # Keep each thread's connection open between requests instead of reconnecting to the remote host every time,
+        # and check it still works before reusing it
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        # Only read by the pooled backend (see DATABASE_POOL below and website/db/pool.py)
+        'POOL': {
+            'MIN_SIZE': 2,
+            'MAX_SIZE': 10,
+            'IDLE_TIMEOUT': 300,
+            'ACQUIRE_TIMEOUT': 30,
+        },
     }
 }
 
+# Set to True to share a pool of MySQL connections between threads instead of one persistent connection per thread.
+# With the pool, CONN_MAX_AGE = 0 hands the connection back to the pool at the end of every request.
+DATABASE_POOL = False
+if DATABASE_POOL:
+    DATABASES['default']['ENGINE'] = 'website.db.backends.mysql'
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -147,6 +168,62 @@ STATICFILES_DIRS = [
     BASE_DIR / "website" / "static",
 ]
 
+# Cache
+# Dashboard fragments, their version counter, role versions and the admin analytics. Every worker process must
+# see the same counters, or a booking made through one process leaves the others serving stale fragments, so this
+# is a file-based cache shared by the processes on the host. Use memcached or redis when running on several hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+DASHBOARD_CACHE_TIMEOUT = 300  # seconds
+ANALYTICS_CACHE_TIMEOUT = 600  # seconds the admin analytics are reused before being recomputed
+
+# Sessions
+# SESSION_STORE picks where sessions live:
+#   'db'             - the database only: a session SELECT on every authenticated request, a write whenever it changes
+#   'cached_db'      - read from the 'sessions' cache and only hit the database on a miss; writes go to both
+#   'signed_cookies' - a signed cookie, so no database access at all (sessions can't be revoked server-side,
+#                      and the cookie travels with every request)
+# 'python manage.py benchmarkSessions' compares the database round trips of the three.
+SESSION_STORE = 'db'
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STORE]
+# File-based so every worker process on the host shares the cached sessions
+SESSION_CACHE_ALIAS = 'sessions'
+CACHES['sessions'] = {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': BASE_DIR / 'sessionCache',
+    'TIMEOUT': SESSION_COOKIE_AGE,
+    'OPTIONS': {'MAX_ENTRIES': 10000},
+}
+
+# 'manage.py test' gets in-process caches of its own, so a test run never reads stale entries from, or clears,
+# the shared caches above
+if len(sys.argv) > 1 and sys.argv[1] == 'test':
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test'},
+        'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'testSessions'},
+    }
+
+# Background report jobs
+# Finished CSVs from the report worker (python manage.py runReportWorker) are written here
+REPORT_JOB_DIR = BASE_DIR / 'reportJobs'
+REPORT_WORKER_PROCESSES = 2
+REPORT_JOB_TIMEOUT = 3600  # seconds before a job still 'running' is assumed abandoned and queued again
+
+# Request profiling: every request is logged to profiling.log and added to the histograms at /api/admin/metrics/.
+# Requests that run at least PROFILING_QUERY_THRESHOLD queries are flagged as likely N+1 offenders.
+PROFILING_ENABLED = True
+PROFILING_QUERY_THRESHOLD = 50
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -162,6 +239,11 @@ LOGGING = {
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'security.log',
         },
+        'profiling': {
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'profiling.log',
+        },
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
@@ -173,5 +255,10 @@ LOGGING = {
             'level': 'WARNING',
             'propagate': True,
         },
+        'website.profiling': {
+            'handlers': ['profiling'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
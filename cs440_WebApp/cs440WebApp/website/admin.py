@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ServiceProvider, UserProfile, AdminProfile, AppointmentSlot, Booking
+from .models import ServiceProvider, UserProfile, AdminProfile, AppointmentSlot, Booking, ReportJob
 
 # Register models for Django admin interface
 admin.site.register(ServiceProvider)
@@ -7,3 +7,4 @@ admin.site.register(UserProfile)
 admin.site.register(AdminProfile)
 admin.site.register(AppointmentSlot)
 admin.site.register(Booking)
+admin.site.register(ReportJob)
@@ -0,0 +1,93 @@
+from datetime import datetime, time, timedelta
+from django.db.models import Count, F, Q
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay, TruncDate
+from django.utils import timezone
+from .models import AppointmentSlot, Booking, Cancellation
+
+
+# Admin analytics: booking rates, busiest days/hours and cancellations, each a single aggregate query over a
+# date range. adminDashboard caches the result for ANALYTICS_CACHE_TIMEOUT (see caching.cachedAnalytics).
+WEEKDAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+BUSIEST_DAYS = 10
+
+
+def bookingRate(booked, total):
+    return round(100 * booked / total, 1) if total else 0.0
+
+
+def bookingRates(slots, *fields):
+    # Slots offered and booked for each group of fields, with the booked percentage
+    rows = list(slots.order_by()
+                .values(*fields)
+                .annotate(totalSlots=Count('id'), bookedSlots=Count('id', filter=Q(isBooked=True)))
+                .order_by(*fields))
+    for row in rows:
+        row['bookingRate'] = bookingRate(row['bookedSlots'], row['totalSlots'])
+    return rows
+
+
+def busiestDays(bookings):
+    return list(bookings.order_by()
+                .values(day=F('slot__date'))
+                .annotate(bookings=Count('id'))
+                .order_by('-bookings', 'day')[:BUSIEST_DAYS])
+
+
+def bookingsByWeekday(bookings):
+    rows = (bookings.order_by()
+            .values(weekday=ExtractIsoWeekDay('slot__date'))
+            .annotate(bookings=Count('id')))
+    counts = {row['weekday']: row['bookings'] for row in rows}
+    return [{'weekday': name, 'bookings': counts.get(number, 0)} for number, name in enumerate(WEEKDAY_NAMES, start=1)]
+
+
+def bookingsByHour(bookings):
+    return list(bookings.order_by()
+                .values(hour=ExtractHour('slot__startTime'))
+                .annotate(bookings=Count('id'))
+                .order_by('hour'))
+
+
+def bookingsMadePerDay(startAt, endAt):
+    # When bookings were made, as opposed to when the appointments are
+    return list(Booking.objects.filter(bookedAt__gte=startAt, bookedAt__lt=endAt).order_by()
+                .values(day=TruncDate('bookedAt'))
+                .annotate(bookings=Count('id'))
+                .order_by('day'))
+
+
+def cancellationCounts(startAt, endAt):
+    cancellations = Cancellation.objects.filter(canceledAt__gte=startAt, canceledAt__lt=endAt).order_by()
+    totals = cancellations.aggregate(
+        total=Count('id'),
+        booked=Count('id', filter=Q(wasBooked=True)),
+        byUser=Count('id', filter=Q(canceledBy='user')),
+        byProvider=Count('id', filter=Q(canceledBy='provider')),
+        byAdmin=Count('id', filter=Q(canceledBy='admin')),
+    )
+    totals['perDay'] = list(cancellations.values(day=TruncDate('canceledAt')).annotate(cancellations=Count('id')).order_by('day'))
+    return totals
+
+
+def adminAnalytics(startDate, endDate):
+    # Slot and booking figures cover appointments dated startDate-endDate; bookings made and cancellations
+    # cover what happened between those dates
+    slots = AppointmentSlot.objects.filter(date__gte=startDate, date__lte=endDate)
+    bookings = Booking.objects.filter(slot__date__gte=startDate, slot__date__lte=endDate)
+    startAt = timezone.make_aware(datetime.combine(startDate, time.min))
+    endAt = timezone.make_aware(datetime.combine(endDate + timedelta(days=1), time.min))
+    totals = slots.aggregate(totalSlots=Count('id'), bookedSlots=Count('id', filter=Q(isBooked=True)))
+    totals['bookingRate'] = bookingRate(totals['bookedSlots'], totals['totalSlots'])
+    return {
+        'startDate': startDate,
+        'endDate': endDate,
+        'generatedAt': timezone.now(),
+        'totals': totals,
+        'byProviderAndType': bookingRates(slots, 'providerUsername', 'providerFirstName', 'providerLastName', 'appointmentType'),
+        'byType': bookingRates(slots, 'appointmentType'),
+        'busiestDays': busiestDays(bookings),
+        'byWeekday': bookingsByWeekday(bookings),
+        'byHour': bookingsByHour(bookings),
+        'bookingsMade': bookingsMadePerDay(startAt, endAt),
+        'cancellations': cancellationCounts(startAt, endAt),
+    }
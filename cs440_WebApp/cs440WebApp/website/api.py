@@ -0,0 +1,114 @@
+import hashlib
+from functools import wraps
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_GET
+from . import metrics
+from .caching import cachedFragment, currentMinute, getDashboardLastChanged, getDashboardVersion
+from .models import AppointmentSlot, Booking
+from .roles import requestRole
+from .utils import (availabilityCounts, filterAppointmentSlots, filterBookings, getCalendarParams, getPageSize,
+                    paginateByKeyset, SLOT_KEYSET_FIELDS, BOOKING_KEYSET_FIELDS)
+
+
+# Read-only JSON endpoints for slot search. They share the dashboards' filter semantics and keyset pagination,
+# and answer conditional GETs with 304 while no slot or booking has changed.
+
+def apiRoleRequired(roleCheck):
+    # JSON flavour of the role decorators in views.py: 403 instead of a redirect to the login page
+    def decorator(viewFunction):
+        @wraps(viewFunction)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated or not roleCheck(requestRole(request)):
+                return JsonResponse({'error': "Access denied."}, status=403)
+            return viewFunction(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+isUser = lambda role: role.isUser
+isAdmin = lambda role: role.isAdmin
+
+
+def resultsETag(request, *args, **kwargs):
+    # Built from the dashboard version counter, so checking it costs no database queries
+    raw = f"{getDashboardVersion()}:{request.user.id}:{request.get_full_path()}:{currentMinute().isoformat()}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+def resultsLastModified(request, *args, **kwargs):
+    lastChanged = getDashboardLastChanged()
+    if lastChanged is None:
+        return None
+    return max(lastChanged, currentMinute())
+
+conditionalResults = condition(etag_func=resultsETag, last_modified_func=resultsLastModified)
+
+
+def pageResponse(request, queryset, fields, keysetFields=SLOT_KEYSET_FIELDS):
+    # Project rows with values() and return one keyset page plus its cursors
+    page = paginateByKeyset(
+        queryset.values(*fields),
+        request.GET.get('after', ''),
+        request.GET.get('before', ''),
+        getPageSize(request),
+        keysetFields,
+    )
+    return JsonResponse({'results': page['rows'], 'next': page['nextCursor'], 'prev': page['prevCursor']})
+
+
+SLOT_FIELDS = ('id', 'appointmentName', 'appointmentType', 'providerFirstName', 'providerLastName', 'date', 'startTime', 'endTime')
+BOOKING_FIELDS = ('id', 'slot_id', 'slot__appointmentName', 'slot__appointmentType', 'slot__providerUsername',
+                  'slot__providerFirstName', 'slot__providerLastName', 'slot__date', 'slot__startTime', 'slot__endTime')
+ADMIN_FIELDS = SLOT_FIELDS + ('providerUsername', 'isBooked', 'isPastSlot', 'booking__user__first_name', 'booking__user__last_name')
+
+
+@require_GET
+@apiRoleRequired(isUser)
+@conditionalResults
+def availableSlots(request):
+    slots = AppointmentSlot.objects.filter(isBooked=False).upcoming()
+    slots = filterAppointmentSlots(slots, request.GET.get('searchInput', ''), request.GET.get('typeFilter', ''), request.GET.get('dateFilter', ''))
+    return pageResponse(request, slots, SLOT_FIELDS)
+
+
+@require_GET
+@apiRoleRequired(isUser)
+@conditionalResults
+def myBookings(request):
+    bookings = Booking.objects.filter(user=request.user).upcoming()
+    bookings = filterBookings(bookings, request.GET.get('searchInput', ''), request.GET.get('typeFilter', ''))
+    return pageResponse(request, bookings, BOOKING_FIELDS, BOOKING_KEYSET_FIELDS)
+
+
+@require_GET
+@apiRoleRequired(isUser)
+@conditionalResults
+def availability(request):
+    # Per-day, per-type open/booked counts for the calendar range; days without upcoming slots are left out
+    params = getCalendarParams(request)
+    counts = cachedFragment('availability', {
+        'first': params['firstDate'].isoformat(), 'last': params['lastDate'].isoformat(), 'type': params['typeFilter'],
+    }, lambda: availabilityCounts(params['firstDate'], params['lastDate'], params['typeFilter']))
+    return JsonResponse({
+        'view': params['view'],
+        'firstDate': params['firstDate'],
+        'lastDate': params['lastDate'],
+        'results': counts,
+    })
+
+
+@require_GET
+@apiRoleRequired(isAdmin)
+@conditionalResults
+def adminAppointments(request):
+    slots = filterAppointmentSlots(AppointmentSlot.objects.all(), request.GET.get('searchInput', ''), request.GET.get('typeFilter', ''), request.GET.get('dateFilter', ''))
+    return pageResponse(request, slots, ADMIN_FIELDS)
+
+
+@require_GET
+@apiRoleRequired(isAdmin)
+def requestMetrics(request):
+    # Per-view histograms collected by ProfilingMiddleware in this process
+    return JsonResponse({
+        'queryThreshold': settings.PROFILING_QUERY_THRESHOLD,
+        'views': metrics.snapshot(),
+    })
@@ -0,0 +1,325 @@
+import statistics
+import subprocess
+import time
+from datetime import date, timedelta
+from datetime import time as clockTime
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+from django.db.models import Count, Max, Min
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .booking import bookSlot
+from .middleware import QueryTimer
+from .models import AppointmentSlot, Booking, ServiceProvider, User, UserProfile
+
+
+# Benchmark harness for the booking workload: times and query-counts the hot views through the test client.
+# Run it with 'manage.py runBenchmarks' (see that command for the options).
+BENCHMARK_ADMIN = 'benchadmin'
+
+
+def gitCommit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def datasetCounts():
+    return {
+        'providers': ServiceProvider.objects.count(),
+        'users': UserProfile.objects.count(),
+        'slots': AppointmentSlot.objects.count(),
+        'bookings': Booking.objects.count(),
+    }
+
+
+def loggedInClient(user):
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def busiestUser():
+    # The busiest user gives the dashboards and the user report the most rows to render
+    busiest = Booking.objects.values('user').annotate(total=Count('id')).order_by('-total').first()
+    if busiest:
+        return User.objects.get(id=busiest['user'])
+    profile = UserProfile.objects.select_related('user').order_by('id').first()
+    return profile.user if profile else None
+
+
+class BenchmarkContext:
+    """Accounts, logged-in clients and report parameters shared by every case"""
+
+    def __init__(self):
+        provider = ServiceProvider.objects.select_related('user').order_by('id').first()
+        user = busiestUser()
+        if provider is None or user is None:
+            raise ValueError("The database needs at least one provider and one user; run seedData first.")
+        admin = User.objects.filter(username=BENCHMARK_ADMIN).first()
+        if admin is None:
+            admin = User.objects.create_superuser(BENCHMARK_ADMIN, password=None)
+
+        self.provider = provider
+        self.user = user
+        self.userClient = loggedInClient(user)
+        self.providerClient = loggedInClient(provider.user)
+        self.adminClient = loggedInClient(admin)
+        dates = AppointmentSlot.objects.aggregate(first=Min('date'), last=Max('date'))
+        today = date.today()
+        self.reportRange = {
+            'startDate': (dates['first'] or today).isoformat(),
+            'endDate': (dates['last'] or today).isoformat(),
+        }
+        # Slots created for the book/cancel cases, far past the seeded range so they never overlap anything
+        self.scratchDay = (dates['last'] or today) + timedelta(days=365)
+        self.scratchSlotIds = []
+
+    def scratchSlot(self):
+        self.scratchDay += timedelta(days=1)
+        slot = AppointmentSlot.objects.create(
+            provider=self.provider,
+            providerUsername=self.provider.user.username,
+            providerFirstName=self.provider.firstName,
+            providerLastName=self.provider.lastName,
+            appointmentName="Benchmark Appointment",
+            appointmentType=self.provider.category,
+            date=self.scratchDay,
+            startTime=clockTime(23, 0),
+            endTime=clockTime(23, 30),
+        )
+        self.scratchSlotIds.append(slot.id)
+        return slot
+
+    def cleanup(self):
+        AppointmentSlot.objects.filter(id__in=self.scratchSlotIds).delete()
+
+
+def benchmarkCases(context):
+    # (name, prepare) pairs; prepare() does any untimed setup and returns the request to time
+    def get(client, url):
+        return lambda: lambda: client.get(url)
+
+    def post(client, url, data):
+        return lambda: lambda: client.post(url, data)
+
+    def book():
+        slot = context.scratchSlot()
+        return lambda: context.userClient.post(reverse('bookAppointment', args=[slot.id]))
+
+    def cancel():
+        slot = context.scratchSlot()
+        bookSlot(slot.id, context.user)
+        return lambda: context.userClient.post(reverse('cancelAppointment', args=[slot.id]))
+
+    return [
+        ('userDashboard', get(context.userClient, reverse('userDashboard'))),
+        ('providerDashboard', get(context.providerClient, reverse('providerDashboard'))),
+        ('adminDashboard:appointments', get(context.adminClient, reverse('adminDashboard') + '?view=appointments')),
+        # Search matches searchText with LIKE '%term%', which no index can serve: this times a scan of every slot
+        ('adminDashboard:search', get(context.adminClient, reverse('adminDashboard') + '?' + urlencode({'view': 'appointments', 'searchInput': context.user.last_name}))),
+        ('adminDashboard:users', get(context.adminClient, reverse('adminDashboard') + '?view=users')),
+        ('adminDashboard:analytics', get(context.adminClient, reverse('adminDashboard') + '?' + urlencode(dict(context.reportRange, view='analytics')))),
+        ('bookAppointment', book),
+        ('cancelAppointment', cancel),
+        ('downloadUserReport', post(context.adminClient, reverse('downloadUserReport'), dict(context.reportRange, username=context.user.username))),
+        ('downloadAllUsersReport', post(context.adminClient, reverse('downloadAllUsersReport'), context.reportRange)),
+        ('downloadProviderReport', post(context.adminClient, reverse('downloadProviderReport'), dict(context.reportRange, username=context.provider.user.username))),
+        ('downloadAllProvidersReport', post(context.adminClient, reverse('downloadAllProvidersReport'), context.reportRange)),
+    ]
+
+
+def timeRequest(send, coldCache=True):
+    # One timed request; streamed bodies are read inside the timer because that is where their queries run
+    if coldCache:
+        cache.clear()
+    timer = QueryTimer()
+    start = time.perf_counter()
+    with connection.execute_wrapper(timer):
+        response = send()
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return (time.perf_counter() - start) * 1000, timer.count, response.status_code
+
+
+def runCase(name, prepare, repeat, warmup, coldCache):
+    for _ in range(warmup):
+        timeRequest(prepare(), coldCache)
+    durations, queryCounts, statuses = [], [], set()
+    for _ in range(repeat):
+        durationMs, queries, status = timeRequest(prepare(), coldCache)
+        durations.append(durationMs)
+        queryCounts.append(queries)
+        statuses.add(status)
+    return {
+        'name': name,
+        'statuses': sorted(statuses),
+        'runs': repeat,
+        'minMs': round(min(durations), 3),
+        'medianMs': round(statistics.median(durations), 3),
+        'meanMs': round(statistics.mean(durations), 3),
+        'maxMs': round(max(durations), 3),
+        'minQueries': min(queryCounts),
+        'maxQueries': max(queryCounts),
+    }
+
+
+def runBenchmarks(repeat=5, warmup=1, coldCache=True, only=None):
+    # Returns the machine-readable report: environment, dataset size and one entry per case
+    context = BenchmarkContext()
+    try:
+        results = [runCase(name, prepare, repeat, warmup, coldCache)
+                   for name, prepare in benchmarkCases(context)
+                   if not only or name in only]
+    finally:
+        context.cleanup()
+    return {
+        'generatedAt': timezone.now().isoformat(),
+        'commit': gitCommit(),
+        'database': connection.vendor,
+        'dataset': datasetCounts(),
+        'repeat': repeat,
+        'warmup': warmup,
+        'coldCache': coldCache,
+        'results': results,
+    }
+
+
+# Connection reuse benchmark: simulated requests that each run a few queries, under three connection strategies
+POOLED_ENGINES = {
+    'mysql': 'website.db.backends.mysql',
+    'sqlite': 'website.db.backends.sqlite3',
+}
+
+
+def connectionModes(settingsDict, vendor):
+    # (mode, engine, settings overrides) for reconnecting every request, one persistent connection, and the pool
+    modes = [
+        ('fresh', settingsDict['ENGINE'], {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}),
+        ('persistent', settingsDict['ENGINE'], {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True}),
+    ]
+    if vendor in POOLED_ENGINES:
+        modes.append(('pooled', POOLED_ENGINES[vendor], {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}))
+    return modes
+
+
+def simulateRequests(wrapper, requests, queriesPerRequest):
+    # Mirrors what Django does around each request: close_if_unusable_or_obsolete() on request_started and
+    # request_finished, with the view's queries in between
+    totals, firstQueries = [], []
+    for _ in range(requests):
+        start = time.perf_counter()
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            for i in range(queriesPerRequest):
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+                if i == 0:
+                    firstQueries.append((time.perf_counter() - start) * 1000)
+        wrapper.close_if_unusable_or_obsolete()
+        totals.append((time.perf_counter() - start) * 1000)
+    wrapper.close()
+    return totals, firstQueries
+
+
+def runConnectionBenchmark(requests=200, queriesPerRequest=3):
+    settingsDict = dict(connection.settings_dict)
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        raise ValueError("Connection benchmarks need a file or server database; in-memory SQLite can't be reopened.")
+    results = []
+    for mode, engine, overrides in connectionModes(settingsDict, connection.vendor):
+        wrapper = load_backend(engine).DatabaseWrapper(dict(settingsDict, ENGINE=engine, **overrides), alias=f"benchmark-{mode}")
+        opened = []
+        def countConnects(sender, connection, **kwargs):
+            if connection is wrapper:
+                opened.append(1)
+        connection_created.connect(countConnects, weak=False)
+        try:
+            totals, firstQueries = simulateRequests(wrapper, requests, queriesPerRequest)
+        finally:
+            connection_created.disconnect(countConnects)
+        pool = getattr(wrapper, 'pool', None)
+        if pool is not None:
+            connectionsOpened = pool.stats()['opened']
+            pool.closeAll()
+        else:
+            connectionsOpened = len(opened)
+        results.append({
+            'mode': mode,
+            'engine': engine,
+            'requests': requests,
+            'connectionsOpened': connectionsOpened,
+            'medianRequestMs': round(statistics.median(totals), 4),
+            'meanRequestMs': round(statistics.mean(totals), 4),
+            'medianFirstQueryMs': round(statistics.median(firstQueries), 4),
+            'meanFirstQueryMs': round(statistics.mean(firstQueries), 4),
+        })
+    fresh = results[0]['meanFirstQueryMs']
+    for result in results:
+        # Time the first query of a request loses to opening the connection, compared with the fresh mode
+        result['connectOverheadSavedMs'] = round(fresh - result['meanFirstQueryMs'], 4)
+    return {
+        'generatedAt': timezone.now().isoformat(),
+        'commit': gitCommit(),
+        'database': connection.vendor,
+        'queriesPerRequest': queriesPerRequest,
+        'results': results,
+    }
+
+
+# Session store benchmark: database round trips per request under each SESSION_STORE option (see settings.py)
+def sessionQueries(queries):
+    return sum(1 for query in queries if 'django_session' in query['sql'])
+
+
+def runSessionCase(store, engine, user, requests):
+    url = reverse('userDashboard')
+    with override_settings(SESSION_ENGINE=engine):
+        # A new client gets a new handler, so SessionMiddleware picks up the overridden engine
+        client = Client()
+        with CaptureQueriesContext(connection) as loginQueries:
+            client.force_login(user)
+        # One untimed request so the dashboard cache and the session cache are warm for every store alike
+        client.get(url)
+        durations, totals, sessionCounts = [], [], []
+        for _ in range(requests):
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url)
+            durations.append((time.perf_counter() - start) * 1000)
+            totals.append(len(queries))
+            sessionCounts.append(sessionQueries(queries))
+        client.logout()
+    return {
+        'store': store,
+        'engine': engine,
+        'requests': requests,
+        'loginSessionQueries': sessionQueries(loginQueries),
+        'medianRequestMs': round(statistics.median(durations), 3),
+        'meanRequestMs': round(statistics.mean(durations), 3),
+        'queriesPerRequest': round(statistics.mean(totals), 2),
+        'sessionQueriesPerRequest': round(statistics.mean(sessionCounts), 2),
+    }
+
+
+def runSessionBenchmark(requests=50):
+    user = busiestUser()
+    if user is None:
+        raise ValueError("The database needs at least one user; run seedData first.")
+    results = [runSessionCase(store, engine, user, requests) for store, engine in settings.SESSION_ENGINES.items()]
+    return {
+        'generatedAt': timezone.now().isoformat(),
+        'commit': gitCommit(),
+        'database': connection.vendor,
+        'sessionCache': settings.CACHES[settings.SESSION_CACHE_ALIAS]['BACKEND'],
+        'dataset': datasetCounts(),
+        'results': results,
+    }
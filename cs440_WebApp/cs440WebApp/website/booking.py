@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import Subquery
+from .models import AppointmentSlot, Booking, Cancellation, Notification, User
+from .utils import convertFromMilitaryTime
+
+
+# Raised when a slot can't be booked; the message is shown to the user as-is
+class BookingError(Exception):
+    pass
+
+
+def bookSlot(slotId, user):
+    # Book a slot for a user in one transaction:
+    # lock the user, claim the slot with a conditional UPDATE, check the user's overlaps against the claimed row in SQL,
+    # then create the booking.
+    with transaction.atomic():
+        # One booking per user at a time: without the row lock, two requests for different overlapping slots
+        # could both pass the overlap check below and both commit
+        User.objects.select_for_update().only('id').get(pk=user.pk)
+
+        # Only one request can flip isBooked from False to True; everyone else updates zero rows
+        claimed = AppointmentSlot.objects.filter(id=slotId, isBooked=False).update(isBooked=True)
+        if not claimed:
+            if not AppointmentSlot.objects.filter(id=slotId).exists():
+                raise BookingError("Sorry, this appointment is no longer available.")
+            raise BookingError("Sorry, this appointment has already been booked.")
+
+        # Two time slots overlap if one starts before the other ends. The claimed slot's date and times are read
+        # inside this query from the row the UPDATE just locked, so they can't have changed since the claim.
+        claimedSlot = AppointmentSlot.objects.filter(id=slotId)
+        conflict = (Booking.objects
+                    .filter(user=user, slot__date=Subquery(claimedSlot.values('date')),
+                            slot__startTime__lt=Subquery(claimedSlot.values('endTime')),
+                            slot__endTime__gt=Subquery(claimedSlot.values('startTime')))
+                    .values('slot__appointmentName', 'slot__date', 'slot__startTime', 'slot__endTime')
+                    .first())
+        if conflict:
+            # Raising inside the atomic block rolls the claim back
+            raise BookingError(
+                f"Conflicting appointment: You already have '{conflict['slot__appointmentName']}' from "
+                f"{convertFromMilitaryTime(conflict['slot__startTime'])} to {convertFromMilitaryTime(conflict['slot__endTime'])} "
+                f"on {conflict['slot__date'].strftime('%m/%d/%Y')}."
+            )
+
+        return Booking.objects.create(slot_id=slotId, user=user)
+
+
+def cancelSlots(slotIds):
+    # Admin cancellation of many slots in one transaction with a fixed number of queries:
+    # load the slots with their bookings and providers, insert every notice and cancellation record, then delete the slots.
+    # Returns the number of slots canceled.
+    slotIds = [int(slotId) for slotId in slotIds if str(slotId).isdigit()]
+    with transaction.atomic():
+        slots = list(AppointmentSlot.objects.filter(id__in=slotIds).select_related('booking__user', 'provider__user'))
+        if not slots:
+            return 0
+
+        notices = []
+        for slot in slots:
+            formattedStartTime = convertFromMilitaryTime(slot.startTime)
+            formattedEndTime = convertFromMilitaryTime(slot.endTime)
+            formattedDate = slot.date.strftime('%m/%d/%Y')
+            booking = getattr(slot, 'booking', None)
+            providerId = slot.provider.user_id if slot.provider else None
+            if booking:
+                notices.append((booking.user_id, f"Your appointment '{slot.appointmentName}' with {slot.providerFirstName} {slot.providerLastName} "
+                                                 f"on {formattedDate} at {formattedStartTime}-{formattedEndTime} was canceled by an administrator."))
+                if providerId:
+                    notices.append((providerId, f"Your appointment '{slot.appointmentName}' with {booking.user.get_full_name()} "
+                                                f"on {formattedDate} at {formattedStartTime}-{formattedEndTime} was canceled by an administrator."))
+            elif providerId:
+                # If slot was not booked and canceled, just notify provider
+                notices.append((providerId, f"Your appointment '{slot.appointmentName}' "
+                                            f"on {formattedDate} at {formattedStartTime}-{formattedEndTime} was canceled by an administrator."))
+        Notification.objects.notify(notices)
+        Cancellation.objects.bulk_create([Cancellation.forSlot(slot, 'admin', hasattr(slot, 'booking')) for slot in slots])
+
+        # Deleting the slots cascades to their bookings
+        AppointmentSlot.objects.filter(id__in=[slot.id for slot in slots]).delete()
+        return len(slots)
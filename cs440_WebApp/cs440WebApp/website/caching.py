@@ -0,0 +1,79 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .models import AppointmentSlot
+
+
+# Dashboard fragments are cached under keys that include a version counter.
+# Any AppointmentSlot/Booking change bumps the counter (see signals.py), so stale fragments are never read again
+# and simply expire.
+DASHBOARD_VERSION_KEY = 'dashboard:version'
+DASHBOARD_CHANGED_KEY = 'dashboard:changedAt'
+
+def getDashboardVersion():
+    version = cache.get(DASHBOARD_VERSION_KEY)
+    if version is None:
+        # Start from the current time so a counter lost to eviction can't come back as an old value
+        cache.add(DASHBOARD_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(DASHBOARD_VERSION_KEY)
+    return version
+
+def bumpDashboardVersion():
+    try:
+        cache.incr(DASHBOARD_VERSION_KEY)
+    except ValueError:
+        # No counter yet: creating one already gives every key a new version
+        getDashboardVersion()
+    cache.set(DASHBOARD_CHANGED_KEY, timezone.now(), None)
+
+def getDashboardLastChanged():
+    # Time of the last slot/booking change this cache has seen, or None if it doesn't know
+    return cache.get(DASHBOARD_CHANGED_KEY)
+
+def currentMinute():
+    # "Upcoming" depends on the clock, so anything built from it is only reusable within the same minute
+    return timezone.now().replace(second=0, microsecond=0)
+
+def fragmentKey(name, params, userId=None):
+    # Every fragment lists upcoming slots, so the key includes the minute as well as the version
+    digest = hashlib.md5(urlencode(sorted(params.items())).encode()).hexdigest()
+    owner = f"user{userId}" if userId else "all"
+    return f"dashboard:v{getDashboardVersion()}:{currentMinute():%Y%m%d%H%M}:{name}:{owner}:{digest}"
+
+def cachedFragment(name, params, build, userId=None):
+    # Return the cached value for these filter params, building and storing it on a miss
+    key = fragmentKey(name, params, userId)
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, settings.DASHBOARD_CACHE_TIMEOUT)
+    return value
+
+
+# Appointment type catalog for the type dropdowns: one DISTINCT query, cached until a slot is created or deleted
+APPOINTMENT_TYPES_KEY = 'appointmentTypes'
+
+def getAppointmentTypes():
+    types = cache.get(APPOINTMENT_TYPES_KEY)
+    if types is None:
+        distinctTypes = AppointmentSlot.objects.order_by().values_list('appointmentType', flat=True).distinct()
+        types = sorted(set(appointmentType.strip() for appointmentType in distinctTypes))
+        cache.set(APPOINTMENT_TYPES_KEY, types, None)
+    return types
+
+def clearAppointmentTypes():
+    cache.delete(APPOINTMENT_TYPES_KEY)
+
+
+# Admin analytics are aggregates over whole date ranges; they are cached for ANALYTICS_CACHE_TIMEOUT seconds
+# rather than invalidated on every booking, so the numbers can be up to that old
+def cachedAnalytics(startDate, endDate, build):
+    key = f"analytics:{startDate.isoformat()}:{endDate.isoformat()}"
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, settings.ANALYTICS_CACHE_TIMEOUT)
+    return value
@@ -0,0 +1,9 @@
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+from website.db.pool import PooledDatabaseWrapperMixin
+
+
+# MySQL backend whose connections come from a shared pool ('ENGINE': 'website.db.backends.mysql')
+class DatabaseWrapper(PooledDatabaseWrapperMixin, MySQLDatabaseWrapper):
+    def checkPooledConnection(self, conn):
+        # mysqlclient's ping() round-trips without running a query
+        conn.ping()
@@ -0,0 +1,12 @@
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from website.db.pool import PooledDatabaseWrapperMixin
+
+
+# SQLite backend whose connections come from a shared pool ('ENGINE': 'website.db.backends.sqlite3').
+# Used as a local stand-in for the pooled MySQL backend when benchmarking.
+class DatabaseWrapper(PooledDatabaseWrapperMixin, SQLiteDatabaseWrapper):
+    def _close(self):
+        # In-memory databases live only as long as their connection, so never pool them
+        if self.is_in_memory_db():
+            return super(PooledDatabaseWrapperMixin, self)._close()
+        return super()._close()
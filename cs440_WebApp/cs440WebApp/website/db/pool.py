@@ -0,0 +1,160 @@
+import threading
+import time
+from django.db import DatabaseError
+
+
+# Process-wide pool of raw DB-API connections shared by every thread's Django connection.
+# Checked-out connections are health-checked, idle ones past IDLE_TIMEOUT are closed down to MIN_SIZE,
+# and at most MAX_SIZE connections are ever open at once.
+POOL_DEFAULTS = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'IDLE_TIMEOUT': 300,  # seconds an unused connection stays open above MIN_SIZE
+    'ACQUIRE_TIMEOUT': 30,  # seconds to wait for a free connection when MAX_SIZE are in use
+}
+
+
+class PoolTimeout(DatabaseError):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, check, minSize=1, maxSize=10, idleTimeout=300, acquireTimeout=30):
+        self.check = check
+        self.minSize = minSize
+        self.maxSize = max(maxSize, minSize, 1)
+        self.idleTimeout = idleTimeout
+        self.acquireTimeout = acquireTimeout
+        # (connection, time it was returned), most recently returned last
+        self.idle = []
+        self.size = 0
+        # Connections opened over the pool's lifetime
+        self.opened = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, connect):
+        # Reuse a healthy idle connection, or open one with connect() while under MAX_SIZE
+        deadline = time.monotonic() + self.acquireTimeout
+        with self.condition:
+            while True:
+                self.evictIdle()
+                if self.idle:
+                    conn, _ = self.idle.pop()
+                    break
+                if self.size < self.maxSize:
+                    # Reserve the slot now and connect outside the lock
+                    self.size += 1
+                    self.opened += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No database connection became free within {self.acquireTimeout} seconds.")
+                self.condition.wait(remaining)
+
+        if conn is not None:
+            if self.isHealthy(conn):
+                return conn
+            self.discard(conn)
+            return self.acquire(connect)
+        try:
+            return connect()
+        except Exception:
+            self.discard(None)
+            raise
+
+    def release(self, conn, rollback=True):
+        # Roll back anything left open so the next borrower starts clean; drop connections that can't
+        if rollback:
+            try:
+                conn.rollback()
+            except Exception:
+                self.discard(conn)
+                return
+        with self.condition:
+            self.idle.append((conn, time.monotonic()))
+            self.evictIdle()
+            self.condition.notify()
+
+    def discard(self, conn):
+        if conn is not None:
+            self.closeQuietly(conn)
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def evictIdle(self):
+        # Caller holds the lock. The oldest idle connections are at the front.
+        now = time.monotonic()
+        while self.idle and self.size > self.minSize and now - self.idle[0][1] > self.idleTimeout:
+            conn, _ = self.idle.pop(0)
+            self.size -= 1
+            self.closeQuietly(conn)
+
+    def isHealthy(self, conn):
+        try:
+            self.check(conn)
+            return True
+        except Exception:
+            return False
+
+    def closeQuietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def closeAll(self):
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.size -= len(idle)
+        for conn, _ in idle:
+            self.closeQuietly(conn)
+
+    def stats(self):
+        with self.condition:
+            return {'size': self.size, 'idle': len(self.idle), 'inUse': self.size - len(self.idle), 'opened': self.opened}
+
+
+_pools = {}
+_poolsLock = threading.Lock()
+
+
+def selectOne(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+class PooledDatabaseWrapperMixin:
+    """Mix into a backend's DatabaseWrapper so connect()/close() borrow from and return to a shared pool.
+    Pool sizes come from the database's POOL setting (see POOL_DEFAULTS)."""
+
+    def checkPooledConnection(self, conn):
+        selectOne(conn)
+
+    @property
+    def pool(self):
+        key = (self.alias, self.settings_dict['ENGINE'], str(self.settings_dict['NAME']), self.settings_dict.get('HOST'), self.settings_dict.get('USER'))
+        with _poolsLock:
+            if key not in _pools:
+                options = dict(POOL_DEFAULTS, **self.settings_dict.get('POOL', {}))
+                _pools[key] = ConnectionPool(
+                    self.checkPooledConnection,
+                    minSize=options['MIN_SIZE'],
+                    maxSize=options['MAX_SIZE'],
+                    idleTimeout=options['IDLE_TIMEOUT'],
+                    acquireTimeout=options['ACQUIRE_TIMEOUT'],
+                )
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire(lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            # Autocommit connections outside a transaction have nothing to roll back
+            self.pool.release(self.connection, rollback=self.in_atomic_block or not self.get_autocommit())
@@ -1,8 +1,9 @@
 from django import forms
-from .models import ServiceProvider , AppointmentSlot
+from .models import ServiceProvider , AppointmentSlot, ReportJob
+from .caching import bumpDashboardVersion, clearAppointmentTypes
 from django.contrib.auth.models import User
-from django.db import connection
-from datetime import datetime
+from django.db import connection, transaction
+from datetime import datetime, timedelta
 import re
 
 
@@ -167,6 +168,7 @@ class AppointmentSlotForm(forms.Form):
         #Create and save a new AppointmentSlot for the given provider.
         cd = self.cleaned_data
         slot = AppointmentSlot(
+            provider=providerProfile,
             providerUsername=providerProfile.user.username,
             providerFirstName=providerProfile.firstName,
             providerLastName=providerProfile.lastName,
@@ -179,3 +181,144 @@ class AppointmentSlotForm(forms.Form):
         )
         slot.save()
         return slot
+
+
+# Form for admins to queue a CSV report for the background report worker
+class ReportJobForm(forms.Form):
+    reportType = forms.ChoiceField(choices=ReportJob.reportTypeChoices)
+    username = forms.CharField(max_length=150, required=False)
+    startDate = forms.DateField()
+    endDate = forms.DateField()
+    appointmentType = forms.CharField(max_length=100, required=False)
+
+    # Validate the date range and that single-account reports name an account
+    def clean(self):
+        cleaned_data = super().clean()
+        startDate = cleaned_data.get("startDate")
+        endDate = cleaned_data.get("endDate")
+
+        if startDate and endDate and endDate < startDate:
+            self.add_error('endDate', "End date must be on or after the start date.")
+
+        if cleaned_data.get("reportType") in ('user', 'provider') and not cleaned_data.get("username"):
+            self.add_error('username', "A username is required for this report.")
+
+        return cleaned_data
+
+    def save(self, requestedBy):
+        #Create and return a pending ReportJob for the given admin.
+        return ReportJob.objects.create(requestedBy=requestedBy, **self.cleaned_data)
+
+
+# Form for service providers to publish a repeating schedule of appointment slots in one request
+class RecurringSlotForm(forms.Form):
+    weekdayChoices = [('0', 'Mon'), ('1', 'Tue'), ('2', 'Wed'), ('3', 'Thu'), ('4', 'Fri'), ('5', 'Sat'), ('6', 'Sun')]
+    slotLengthChoices = [('15', '15 minutes'), ('30', '30 minutes'), ('45', '45 minutes'), ('60', '1 hour'), ('90', '1.5 hours'), ('120', '2 hours')]
+    # Upper bounds on one submission: slots created, and days covered (checked before any slot is enumerated)
+    maxSlots = 2000
+    maxDays = 366
+
+    appointmentName = forms.CharField(label="Appointment", max_length=100, widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Appointment Name'}))
+    startDate = forms.DateField(label="From", widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    endDate = forms.DateField(label="Until", widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    daysOfWeek = forms.MultipleChoiceField(label="Days", choices=weekdayChoices, widget=forms.CheckboxSelectMultiple)
+    dayStart = forms.TimeField(label="Day Starts", widget=forms.TimeInput(attrs={'type': 'time', 'class': 'form-control'}))
+    dayEnd = forms.TimeField(label="Day Ends", widget=forms.TimeInput(attrs={'type': 'time', 'class': 'form-control'}))
+    slotLength = forms.ChoiceField(label="Slot Length", choices=slotLengthChoices, widget=forms.Select(attrs={'class': 'form-control'}))
+
+    # Validate the date/time ranges and that the schedule produces a sensible number of slots
+    def clean(self):
+        cleaned_data = super().clean()
+        startDate = cleaned_data.get("startDate")
+        endDate = cleaned_data.get("endDate")
+        dayStart = cleaned_data.get("dayStart")
+        dayEnd = cleaned_data.get("dayEnd")
+
+        if startDate and startDate < datetime.now().date():
+            self.add_error('startDate', "Start date cannot be in the past.")
+
+        if startDate and endDate and endDate < startDate:
+            self.add_error('endDate', "End date must be on or after the start date.")
+        elif startDate and endDate and (endDate - startDate).days >= self.maxDays:
+            self.add_error('endDate', f"A schedule can cover at most {self.maxDays} days.")
+
+        if dayStart and dayEnd and dayEnd <= dayStart:
+            self.add_error('dayEnd', "Day end must be after day start.")
+
+        if not self.errors:
+            # Enumerating one past the limit is enough to know the schedule is too big
+            slotCount = len(self.slotTimes(limit=self.maxSlots + 1))
+            if slotCount == 0:
+                self.add_error(None, "This schedule does not produce any appointment slots.")
+            elif slotCount > self.maxSlots:
+                self.add_error(None, f"This schedule would create more than {self.maxSlots} slots, the limit per submission.")
+
+        return cleaned_data
+
+    def slotTimes(self, limit=None):
+        # Compute every (date, startTime, endTime) in the schedule, skipping slots that have already started today.
+        # Stops once 'limit' slots have been found.
+        cd = self.cleaned_data
+        weekdays = {int(day) for day in cd['daysOfWeek']}
+        length = timedelta(minutes=int(cd['slotLength']))
+        now = datetime.now()
+        slots = []
+        day = cd['startDate']
+        while day <= cd['endDate']:
+            if day.weekday() in weekdays:
+                start = datetime.combine(day, cd['dayStart'])
+                dayEnd = datetime.combine(day, cd['dayEnd'])
+                while start + length <= dayEnd:
+                    if start >= now:
+                        slots.append((day, start.time(), (start + length).time()))
+                        if limit is not None and len(slots) >= limit:
+                            return slots
+                    start += length
+            day += timedelta(days=1)
+        return slots
+
+    def save(self, providerProfile):
+        #Create the schedule's slots for the given provider, skipping any that overlap existing slots.
+        #Returns (created slots, number skipped).
+        cd = self.cleaned_data
+        slotTimes = self.slotTimes()
+
+        with transaction.atomic():
+            # The same provider lock AppointmentSlot.save() takes, so the check below can't race another submission
+            AppointmentSlot.lockSchedule(providerProfile.pk)
+
+            # One query for every existing slot the provider has in the date range
+            existing = {}
+            for day, startTime, endTime in (AppointmentSlot.objects
+                                            .filter(provider=providerProfile, date__gte=cd['startDate'], date__lte=cd['endDate'])
+                                            .values_list('date', 'startTime', 'endTime')):
+                existing.setdefault(day, []).append((startTime, endTime))
+
+            newSlots = []
+            skipped = 0
+            for day, startTime, endTime in slotTimes:
+                # Two time slots overlap if one starts before the other ends
+                if any(startTime < existingEnd and endTime > existingStart for existingStart, existingEnd in existing.get(day, [])):
+                    skipped += 1
+                    continue
+                newSlots.append(AppointmentSlot(
+                    provider=providerProfile,
+                    providerUsername=providerProfile.user.username,
+                    providerFirstName=providerProfile.firstName,
+                    providerLastName=providerProfile.lastName,
+                    appointmentName=cd.get('appointmentName'),
+                    appointmentType=providerProfile.category,
+                    date=day,
+                    startTime=startTime,
+                    endTime=endTime,
+                    isBooked=False,
+                ))
+                # bulk_create skips save(), so fill in the search text here
+                newSlots[-1].searchText = newSlots[-1].buildSearchText()
+
+            # Overlaps were checked above under the lock, so insert in batches without the per-slot save() check
+            created = AppointmentSlot.objects.bulk_create(newSlots, batch_size=500)
+        # bulk_create doesn't send post_save, so invalidate the dashboard cache and type catalog here
+        bumpDashboardVersion()
+        clearAppointmentTypes()
+        return created, skipped
@@ -0,0 +1,33 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from website.benchmarks import runConnectionBenchmark
+
+
+# Measures per-request connect overhead with fresh, persistent (CONN_MAX_AGE) and pooled connections:
+#   python manage.py benchmarkConnections --settings=cs440WebApp.benchmarkSettings
+# Point it at a local MySQL server to measure the MySQL backends instead.
+class Command(BaseCommand):
+    help = "Compare per-request connection overhead for fresh, persistent and pooled database connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Simulated requests per mode")
+        parser.add_argument('--queries', type=int, default=3, help="Queries per simulated request")
+        parser.add_argument('--output', default='-', help="Report path, or '-' for stdout")
+
+    def handle(self, *args, **options):
+        try:
+            report = runConnectionBenchmark(max(1, options['requests']), max(1, options['queries']))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for result in report['results']:
+            self.stdout.write(f"{result['mode']:<11} first query {result['meanFirstQueryMs']:>8.3f} ms   "
+                              f"request {result['meanRequestMs']:>8.3f} ms   connections opened {result['connectionsOpened']}")
+
+        output = json.dumps(report, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        else:
+            with open(options['output'], 'w') as reportFile:
+                reportFile.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Connection benchmark report written to {options['output']}"))
@@ -0,0 +1,37 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+from website.benchmarks import runSessionBenchmark
+
+
+# Counts the database round trips a logged-in dashboard request makes under each SESSION_STORE option:
+#   python manage.py benchmarkSessions --settings=cs440WebApp.benchmarkSettings
+# Run it against the real database to see what switching SESSION_STORE in settings.py saves there.
+class Command(BaseCommand):
+    help = "Compare per-request session queries and timings for the db, cached_db and signed_cookies session stores"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Timed dashboard requests per session store")
+        parser.add_argument('--output', default='-', help="Report path, or '-' for stdout")
+
+    def handle(self, *args, **options):
+        # Lets the test client's 'testserver' host through ALLOWED_HOSTS
+        setup_test_environment()
+        try:
+            report = runSessionBenchmark(max(1, options['requests']))
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            teardown_test_environment()
+
+        for result in report['results']:
+            self.stdout.write(f"{result['store']:<15} session queries/request {result['sessionQueriesPerRequest']:>5}   "
+                              f"queries/request {result['queriesPerRequest']:>6}   median {result['medianRequestMs']:>8.2f} ms")
+
+        output = json.dumps(report, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        else:
+            with open(options['output'], 'w') as reportFile:
+                reportFile.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Session benchmark report written to {options['output']}"))
@@ -0,0 +1,51 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.db import connection
+from website.models import AppointmentSlot, Booking
+
+
+# Runs EXPLAIN on the hot query shapes and reports whether each one uses its composite index.
+# Shapes listed without an index are known scans, reported so the output doesn't suggest they are covered.
+class Command(BaseCommand):
+    help = "EXPLAIN the AppointmentSlot/Booking hot queries and check that the composite indexes are used"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help="Print the full query plan for every query")
+
+    def hotQueries(self):
+        today = date.today()
+        # (label, expected index, queryset) for every shape the views and reports filter on
+        return [
+            ("Provider overlap check (AppointmentSlot.save, RecurringSlotForm)", 'slot_providerfk_date_idx',
+             AppointmentSlot.objects.filter(provider_id=1, date=today)),
+            ("Provider's slots (providerDashboard, provider report)", 'slot_providerfk_date_idx',
+             AppointmentSlot.objects.filter(provider_id=1, date__gte=today)),
+            ("Open slots (userDashboard)", 'slot_date_booked_idx',
+             AppointmentSlot.objects.filter(isBooked=False).upcoming()),
+            ("Slots by type (reports)", 'slot_type_date_idx',
+             AppointmentSlot.objects.filter(appointmentType='Medical', date__gte=today, date__lte=today)),
+            ("Same-day bookings (bookAppointment)", 'booking_user_slot_idx',
+             Booking.objects.filter(user_id=1, slot__date=today)),
+            # searchText only replaces the ORs across slot and user columns; LIKE '%term%' still reads every row
+            ("Dashboard search (searchText LIKE '%term%')", None,
+             AppointmentSlot.objects.filter(searchText__contains='smith')),
+        ]
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Database vendor: {connection.vendor}")
+        missing = 0
+        for label, indexName, queryset in self.hotQueries():
+            plan = queryset.explain()
+            if indexName is None:
+                self.stdout.write(f"[full scan, no index] {label}")
+            elif indexName in plan:
+                self.stdout.write(self.style.SUCCESS(f"[uses {indexName}] {label}"))
+            else:
+                missing += 1
+                self.stdout.write(self.style.WARNING(f"[missing {indexName}] {label}"))
+            if options['verbose_plans'] or (indexName and indexName not in plan):
+                self.stdout.write(plan)
+        if missing:
+            self.stdout.write(self.style.WARNING(f"{missing} query shape(s) did not use the expected index."))
+        else:
+            self.stdout.write(self.style.SUCCESS("All indexed query shapes use their composite indexes."))
@@ -0,0 +1,55 @@
+import json
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from website.benchmarks import runBenchmarks
+
+
+# Times the booking workload's hot views against SQLite and writes a JSON report to compare across commits:
+#   python manage.py runBenchmarks --settings=cs440WebApp.benchmarkSettings --seed --output benchmark.json
+class Command(BaseCommand):
+    help = "Benchmark the dashboards, booking, cancellation and CSV reports and write a JSON report"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='benchmark.json', help="Report path, or '-' for stdout")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per case")
+        parser.add_argument('--warmup', type=int, default=1, help="Untimed runs per case before timing")
+        parser.add_argument('--warm-cache', action='store_true', help="Keep the cache between runs instead of clearing it before each one")
+        parser.add_argument('--only', nargs='*', default=None, help="Only run the named cases")
+        parser.add_argument('--seed', action='store_true', help="Migrate, flush and seed the benchmark database first")
+        parser.add_argument('--providers', type=int, default=20, help="Providers to seed with --seed")
+        parser.add_argument('--users', type=int, default=200, help="Users to seed with --seed")
+        parser.add_argument('--days', type=int, default=30, help="Days of slots to seed with --seed")
+        parser.add_argument('--booking-ratio', type=float, default=0.5, help="Fraction of slots booked with --seed")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Benchmarks run against SQLite; use --settings=cs440WebApp.benchmarkSettings.")
+
+        if options['seed']:
+            call_command('migrate', verbosity=0)
+            call_command('flush', interactive=False, verbosity=0)
+            call_command('seedData', providers=options['providers'], users=options['users'],
+                         days=options['days'], booking_ratio=options['booking_ratio'], stdout=self.stdout)
+
+        # Lets the test client's 'testserver' host through ALLOWED_HOSTS
+        setup_test_environment()
+        try:
+            report = runBenchmarks(options['repeat'], max(0, options['warmup']), not options['warm_cache'], options['only'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            teardown_test_environment()
+
+        for result in report['results']:
+            self.stdout.write(f"{result['name']:<30} median {result['medianMs']:>9.2f} ms   "
+                              f"queries {result['minQueries']}-{result['maxQueries']}   status {result['statuses']}")
+
+        output = json.dumps(report, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        else:
+            with open(options['output'], 'w') as reportFile:
+                reportFile.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Benchmark report written to {options['output']}"))
@@ -0,0 +1,41 @@
+import time
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from website.reports import createWorkerPool, processPendingJobs, reclaimStaleJobs
+
+
+# Long-running worker that builds queued ReportJobs in a local process pool
+class Command(BaseCommand):
+    help = "Generate queued admin CSV reports in the background"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.REPORT_WORKER_PROCESSES, help="Number of pool processes")
+        parser.add_argument('--poll-interval', type=float, default=5.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument('--once', action='store_true', help="Process the jobs currently queued and exit")
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        self.stdout.write(f"Report worker started with {processes} process(es).")
+        reclaimed = reclaimStaleJobs()
+        if reclaimed:
+            self.stdout.write(f"Requeued {reclaimed} report job(s) left running by a previous worker.")
+        pool = createWorkerPool(processes)
+        try:
+            while True:
+                try:
+                    results = processPendingJobs(pool, processes)
+                except BrokenProcessPool:
+                    # The batch's jobs are already marked failed; start over with a fresh pool
+                    self.stderr.write("A report worker process exited unexpectedly; restarting the pool.")
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = createWorkerPool(processes)
+                    continue
+                for jobId, status in results.items():
+                    self.stdout.write(f"Report job {jobId}: {status}")
+                if not results:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+        finally:
+            pool.shutdown()
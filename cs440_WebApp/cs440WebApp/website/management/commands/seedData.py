@@ -0,0 +1,121 @@
+import random
+from datetime import date, datetime, timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from website.caching import bumpDashboardVersion, clearAppointmentTypes
+from website.models import AppointmentSlot, Booking, ServiceProvider, User, UserProfile
+
+
+# Seeds a synthetic providers/users/slots/bookings dataset with bulk_create, for benchmarks and local testing
+class Command(BaseCommand):
+    help = "Seed synthetic providers, users, appointment slots and bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--providers', type=int, default=20, help="Number of providers")
+        parser.add_argument('--users', type=int, default=200, help="Number of users")
+        parser.add_argument('--start-date', default='', help="First slot date as YYYY-MM-DD (default: 7 days ago)")
+        parser.add_argument('--days', type=int, default=30, help="Number of days with slots")
+        parser.add_argument('--slots-per-day', type=int, default=8, help="Slots per provider per day")
+        parser.add_argument('--slot-minutes', type=int, default=30, help="Length of each slot in minutes")
+        parser.add_argument('--booking-ratio', type=float, default=0.5, help="Fraction of slots to book (0-1)")
+        parser.add_argument('--prefix', default='seed', help="Prefix for generated usernames")
+        parser.add_argument('--password', default='seedPassword1!', help="Password for every generated account")
+        parser.add_argument('--random-seed', type=int, default=440, help="Seed for the random generator")
+        parser.add_argument('--batch-size', type=int, default=1000, help="bulk_create batch size")
+
+    def withIds(self, objects, queryset):
+        # Backends without RETURNING (MySQL) leave primary keys unset after bulk_create, so read the rows back.
+        # Auto-increment ids follow insertion order, so the rows line up with the objects.
+        if not objects or objects[0].pk is not None:
+            return objects
+        return list(queryset.order_by('id'))
+
+    def handle(self, *args, **options):
+        if not 0 <= options['booking_ratio'] <= 1:
+            raise CommandError("--booking-ratio must be between 0 and 1.")
+        if options['slots_per_day'] * options['slot_minutes'] > 16 * 60:
+            raise CommandError("--slots-per-day x --slot-minutes must fit between 06:00 and 22:00.")
+        try:
+            startDate = datetime.strptime(options['start_date'], '%Y-%m-%d').date() if options['start_date'] else date.today() - timedelta(days=7)
+        except ValueError:
+            raise CommandError("--start-date must be YYYY-MM-DD.")
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Accounts starting with '{prefix}' already exist; use another --prefix or flush the database.")
+
+        rng = random.Random(options['random_seed'])
+        batchSize = options['batch_size']
+        # Hash once; every generated account shares the password
+        password = make_password(options['password'])
+        categories = [choice for choice, _ in ServiceProvider.categoryChoices]
+
+        with transaction.atomic():
+            providerUsers = User.objects.bulk_create([
+                User(username=f"{prefix}prov{i}", first_name=f"Provider{i}", last_name=f"Seed{i}", password=password)
+                for i in range(options['providers'])
+            ], batch_size=batchSize)
+            providerUsers = self.withIds(providerUsers, User.objects.filter(username__startswith=f"{prefix}prov"))
+            providers = ServiceProvider.objects.bulk_create([
+                ServiceProvider(user=user, category=categories[i % len(categories)], firstName=user.first_name, lastName=user.last_name)
+                for i, user in enumerate(providerUsers)
+            ], batch_size=batchSize)
+            providers = self.withIds(providers, ServiceProvider.objects.filter(user__in=providerUsers))
+
+            users = User.objects.bulk_create([
+                User(username=f"{prefix}user{i}", first_name=f"User{i}", last_name=f"Seed{i}", password=password)
+                for i in range(options['users'])
+            ], batch_size=batchSize)
+            users = self.withIds(users, User.objects.filter(username__startswith=f"{prefix}user"))
+            UserProfile.objects.bulk_create([
+                UserProfile(user=user, firstName=user.first_name, lastName=user.last_name) for user in users
+            ], batch_size=batchSize)
+
+            slots = []
+            bookedBy = []
+            # Each user can only hold one booking per (date, start time)
+            userTaken = set()
+            slotLength = timedelta(minutes=options['slot_minutes'])
+            for provider, providerUser in zip(providers, providerUsers):
+                for dayOffset in range(options['days']):
+                    day = startDate + timedelta(days=dayOffset)
+                    start = datetime.combine(day, datetime.min.time()).replace(hour=6)
+                    for _ in range(options['slots_per_day']):
+                        slot = AppointmentSlot(
+                            provider=provider,
+                            providerUsername=providerUser.username,
+                            providerFirstName=provider.firstName,
+                            providerLastName=provider.lastName,
+                            appointmentName=f"{provider.category} Appointment",
+                            appointmentType=provider.category,
+                            date=day,
+                            startTime=start.time(),
+                            endTime=(start + slotLength).time(),
+                        )
+                        user = None
+                        if users and rng.random() < options['booking_ratio']:
+                            user = rng.choice(users)
+                            if (user.id, day, slot.startTime) in userTaken:
+                                user = None
+                            else:
+                                userTaken.add((user.id, day, slot.startTime))
+                        slot.isBooked = user is not None
+                        # bulk_create skips save(), so fill in the search text here
+                        slot.searchText = slot.buildSearchText(user.get_full_name() if user else 'Unbooked')
+                        slots.append(slot)
+                        bookedBy.append(user)
+                        start += slotLength
+            AppointmentSlot.objects.bulk_create(slots, batch_size=batchSize)
+            slots = self.withIds(slots, AppointmentSlot.objects.filter(provider__in=providers))
+            Booking.objects.bulk_create([
+                Booking(slot=slot, user=user) for slot, user in zip(slots, bookedBy) if user is not None
+            ], batch_size=batchSize)
+            # bulk_create doesn't send post_save, so invalidate the dashboard cache and type catalog here
+            transaction.on_commit(bumpDashboardVersion)
+            transaction.on_commit(clearAppointmentTypes)
+
+        bookings = sum(1 for user in bookedBy if user is not None)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(providers)} providers, {len(users)} users, {len(slots)} slots and {bookings} bookings "
+            f"from {startDate} over {options['days']} day(s)."
+        ))
@@ -0,0 +1,79 @@
+import threading
+
+
+# In-process request metrics collected by ProfilingMiddleware.
+# Each worker process keeps its own histograms; they reset when the process restarts.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_lock = threading.Lock()
+_views = {}
+
+
+def bucketIndex(buckets, value):
+    # Index of the first bucket whose upper bound holds the value; the last slot is "above every bound"
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            return i
+    return len(buckets)
+
+
+def newViewStats():
+    return {
+        'requests': 0,
+        'flagged': 0,
+        'totalMs': 0.0,
+        'maxMs': 0.0,
+        'totalQueries': 0,
+        'maxQueries': 0,
+        'totalDbMs': 0.0,
+        'latencyCounts': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        'queryCounts': [0] * (len(QUERY_COUNT_BUCKETS) + 1),
+    }
+
+
+def recordRequest(viewName, durationMs, queryCount, dbMs, flagged=False):
+    with _lock:
+        stats = _views.setdefault(viewName, newViewStats())
+        stats['requests'] += 1
+        stats['flagged'] += int(flagged)
+        stats['totalMs'] += durationMs
+        stats['maxMs'] = max(stats['maxMs'], durationMs)
+        stats['totalQueries'] += queryCount
+        stats['maxQueries'] = max(stats['maxQueries'], queryCount)
+        stats['totalDbMs'] += dbMs
+        stats['latencyCounts'][bucketIndex(LATENCY_BUCKETS_MS, durationMs)] += 1
+        stats['queryCounts'][bucketIndex(QUERY_COUNT_BUCKETS, queryCount)] += 1
+
+
+def histogram(buckets, counts):
+    # [{"le": bound, "count": n}, ...] with a final "+Inf" bucket
+    return [{'le': bound, 'count': count} for bound, count in zip(list(buckets) + ['+Inf'], counts)]
+
+
+def snapshot():
+    # Copy of every view's stats with averages and labelled histograms, busiest views first
+    with _lock:
+        views = {name: dict(stats, latencyCounts=list(stats['latencyCounts']), queryCounts=list(stats['queryCounts']))
+                 for name, stats in _views.items()}
+    result = []
+    for name, stats in sorted(views.items(), key=lambda item: item[1]['requests'], reverse=True):
+        requests = stats['requests']
+        result.append({
+            'view': name,
+            'requests': requests,
+            'flagged': stats['flagged'],
+            'avgMs': round(stats['totalMs'] / requests, 2),
+            'maxMs': round(stats['maxMs'], 2),
+            'avgQueries': round(stats['totalQueries'] / requests, 2),
+            'maxQueries': stats['maxQueries'],
+            'avgDbMs': round(stats['totalDbMs'] / requests, 2),
+            'latencyHistogram': histogram(LATENCY_BUCKETS_MS, stats['latencyCounts']),
+            'queryHistogram': histogram(QUERY_COUNT_BUCKETS, stats['queryCounts']),
+        })
+    return result
+
+
+def reset():
+    with _lock:
+        _views.clear()
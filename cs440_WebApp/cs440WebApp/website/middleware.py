@@ -1,10 +1,17 @@
-from django.http import HttpResponseForbidden
+from django.http import FileResponse, HttpResponseForbidden
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.urls import reverse
+from django.conf import settings
+from django.db import connection
+from . import metrics
+from .roles import attachRole
+import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
+profilingLogger = logging.getLogger('website.profiling')
 
 class SecurityMiddleware:
     """Custom security middleware to prevent unauthorized access"""
@@ -46,4 +53,87 @@ class SecurityMiddleware:
             ip = x_forwarded_for.split(',')[0]
         else:
             ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        return ip
+
+
+class RoleMiddleware:
+    """Attach request.role, the user's roles and profiles, resolved once per login and kept in the session"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Lazy, so requests that never check a role don't touch the session
+        attachRole(request)
+        return self.get_response(request)
+
+
+class QueryTimer:
+    """connection.execute_wrapper callback that counts queries and adds up their time"""
+
+    def __init__(self):
+        self.count = 0
+        self.totalMs = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.totalMs += (time.perf_counter() - start) * 1000
+
+
+class ProfilingMiddleware:
+    """Records wall time, DB query count and DB time per view to the profiling log and in-process histograms"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PROFILING_ENABLED', True)
+        self.queryThreshold = getattr(settings, 'PROFILING_QUERY_THRESHOLD', 50)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+
+        if response.streaming and not isinstance(response, FileResponse):
+            # Streamed CSV reports query while the body is sent, so keep timing until the stream is done
+            response.streaming_content = self.timedStream(request, response, response.streaming_content, timer, start)
+        else:
+            self.record(request, response, timer, start)
+        return response
+
+    def timedStream(self, request, response, content, timer, start):
+        try:
+            with connection.execute_wrapper(timer):
+                yield from content
+        finally:
+            self.record(request, response, timer, start)
+
+    def record(self, request, response, timer, start):
+        """Log one structured line per request and add it to the view's histograms"""
+        durationMs = (time.perf_counter() - start) * 1000
+        match = getattr(request, 'resolver_match', None)
+        viewName = match.view_name if match else 'unresolved'
+        # Query counts at or above the threshold usually mean a per-row query (N+1) in the view
+        flagged = timer.count >= self.queryThreshold
+        metrics.recordRequest(viewName, durationMs, timer.count, timer.totalMs, flagged)
+        entry = {
+            'view': viewName,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'durationMs': round(durationMs, 2),
+            'queries': timer.count,
+            'dbMs': round(timer.totalMs, 2),
+            'flagged': flagged,
+        }
+        if flagged:
+            profilingLogger.warning(json.dumps(entry))
+        else:
+            profilingLogger.info(json.dumps(entry))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0004_rename_end_time_appointmentslot_endtime_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointmentslot',
+            index=models.Index(fields=['providerUsername', 'date'], name='slot_provider_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointmentslot',
+            index=models.Index(fields=['date', 'isBooked'], name='slot_date_booked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointmentslot',
+            index=models.Index(fields=['appointmentType', 'date'], name='slot_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'slot'], name='booking_user_slot_idx'),
+        ),
+    ]
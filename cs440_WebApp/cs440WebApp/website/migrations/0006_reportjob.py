@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0005_slot_and_booking_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reportType', models.CharField(choices=[('user', 'User'), ('allUsers', 'All Users'), ('provider', 'Provider'), ('allProviders', 'All Providers')], max_length=20)),
+                ('username', models.CharField(blank=True, max_length=150)),
+                ('startDate', models.DateField()),
+                ('endDate', models.DateField()),
+                ('appointmentType', models.CharField(blank=True, max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+                ('startedAt', models.DateTimeField(blank=True, null=True)),
+                ('finishedAt', models.DateTimeField(blank=True, null=True)),
+                ('fileName', models.CharField(blank=True, max_length=255)),
+                ('rowCount', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('requestedBy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reportJobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'createdAt'], name='reportjob_status_created_idx')],
+            },
+        ),
+    ]
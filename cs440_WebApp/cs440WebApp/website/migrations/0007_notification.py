@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:42
+
+import json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copyCanceledMsgs(apps, schema_editor):
+    Notification = apps.get_model('website', 'Notification')
+    notifications = []
+    for modelName in ('UserProfile', 'ServiceProvider'):
+        profiles = apps.get_model('website', modelName).objects.exclude(canceledMsgs__in=['', '[]'])
+        for userId, canceledMsgs in profiles.values_list('user_id', 'canceledMsgs'):
+            for text in json.loads(canceledMsgs):
+                notifications.append(Notification(recipient_id=userId, text=text))
+    Notification.objects.bulk_create(notifications, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0006_reportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+                ('isRead', models.BooleanField(default=False)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['recipient', 'isRead'], name='notification_unread_idx')],
+            },
+        ),
+        # Copy messages still waiting in the old JSON columns before dropping them
+        migrations.RunPython(copyCanceledMsgs, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='serviceprovider',
+            name='canceledMsgs',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='canceledMsgs',
+        ),
+    ]
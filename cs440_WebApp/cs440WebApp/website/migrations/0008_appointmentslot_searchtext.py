@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:10
+
+from django.db import migrations, models
+
+
+def fillSearchText(apps, schema_editor):
+    AppointmentSlot = apps.get_model('website', 'AppointmentSlot')
+    slots = (AppointmentSlot.objects
+             .values_list('id', 'appointmentName', 'providerUsername', 'providerFirstName', 'providerLastName',
+                          'booking__user__first_name', 'booking__user__last_name')
+             .order_by('id'))
+    batch = []
+    for slotId, appointmentName, providerUsername, providerFirstName, providerLastName, userFirstName, userLastName in slots.iterator(chunk_size=1000):
+        userName = f"{userFirstName} {userLastName}".strip() if userFirstName is not None else 'Unbooked'
+        text = f"{appointmentName} {userName} {providerUsername} {providerFirstName} {providerLastName}".lower()[:500]
+        batch.append(AppointmentSlot(id=slotId, searchText=text))
+        if len(batch) >= 1000:
+            AppointmentSlot.objects.bulk_update(batch, ['searchText'])
+            batch = []
+    AppointmentSlot.objects.bulk_update(batch, ['searchText'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0007_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointmentslot',
+            name='searchText',
+            field=models.CharField(default='', editable=False, max_length=500),
+        ),
+        migrations.RunPython(fillSearchText, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0008_appointmentslot_searchtext'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(fields=['firstName', 'lastName'], name='provider_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(fields=['lastName'], name='provider_lastname_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['firstName', 'lastName'], name='userprofile_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['lastName'], name='userprofile_lastname_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:01
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 500
+
+
+def fillProvider(apps, schema_editor):
+    # Point each slot at its provider by the copied username, one transaction per batch of providers
+    ServiceProvider = apps.get_model('website', 'ServiceProvider')
+    AppointmentSlot = apps.get_model('website', 'AppointmentSlot')
+    providers = list(ServiceProvider.objects.order_by('id').values_list('id', 'user__username'))
+    for start in range(0, len(providers), BATCH_SIZE):
+        with transaction.atomic():
+            for providerId, username in providers[start:start + BATCH_SIZE]:
+                AppointmentSlot.objects.filter(providerUsername=username, provider__isnull=True).update(provider_id=providerId)
+
+
+class Migration(migrations.Migration):
+
+    # Let the backfill commit batch by batch instead of holding one transaction over every slot
+    atomic = False
+
+    dependencies = [
+        ('website', '0009_userprofile_serviceprovider_name_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointmentslot',
+            name='provider',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='slots', to='website.serviceprovider'),
+        ),
+        migrations.AddIndex(
+            model_name='appointmentslot',
+            index=models.Index(fields=['provider', 'date'], name='slot_providerfk_date_idx'),
+        ),
+        migrations.RunPython(fillProvider, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0010_appointmentslot_provider'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cancellation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('providerUsername', models.CharField(max_length=150)),
+                ('appointmentType', models.CharField(max_length=100)),
+                ('slotDate', models.DateField()),
+                ('wasBooked', models.BooleanField(default=True)),
+                ('canceledBy', models.CharField(choices=[('user', 'User'), ('provider', 'Provider'), ('admin', 'Administrator')], max_length=10)),
+                ('canceledAt', models.DateTimeField(auto_now_add=True)),
+                ('provider', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cancellations', to='website.serviceprovider')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['canceledAt'], name='cancellation_canceledat_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:12
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 500
+
+
+def fillProvider(apps, schema_editor):
+    # Slots saved without a provider since 0010 (e.g. through Django admin) get the provider their username names
+    ServiceProvider = apps.get_model('website', 'ServiceProvider')
+    AppointmentSlot = apps.get_model('website', 'AppointmentSlot')
+    usernames = set(AppointmentSlot.objects.filter(provider__isnull=True).values_list('providerUsername', flat=True))
+    providers = list(ServiceProvider.objects.filter(user__username__in=usernames).order_by('id').values_list('id', 'user__username'))
+    for start in range(0, len(providers), BATCH_SIZE):
+        with transaction.atomic():
+            for providerId, username in providers[start:start + BATCH_SIZE]:
+                AppointmentSlot.objects.filter(providerUsername=username, provider__isnull=True).update(provider_id=providerId)
+
+
+class Migration(migrations.Migration):
+
+    # Let the backfill commit batch by batch, as 0010 does
+    atomic = False
+
+    dependencies = [
+        ('website', '0011_cancellation'),
+    ]
+
+    operations = [
+        migrations.RunPython(fillProvider, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0012_fill_missing_slot_provider'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='appointmentslot',
+            name='slot_provider_date_idx',
+        ),
+    ]
@@ -1,5 +1,7 @@
-import json
-from django.db import models
+from pathlib import Path
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.functions import Concat, Lower, Substr
 from django.contrib.auth.models import User
 from datetime import datetime
 
@@ -12,26 +14,32 @@ class ServiceProvider(models.Model):
     qualifications = models.TextField(max_length=200, default="Qualifications")
     firstName = models.CharField(max_length=50, default="Provider")
     lastName = models.CharField(max_length=50, default="Name")
-    canceledMsgs = models.TextField(default="[]", blank=True)
+
+    class Meta:
+        # Admin account search matches name prefixes
+        indexes = [
+            models.Index(fields=['firstName', 'lastName'], name='provider_name_idx'),
+            models.Index(fields=['lastName'], name='provider_lastname_idx'),
+        ]
 
     def getAndClearCanceledMsgs(self):
-        msgs = json.loads(self.canceledMsgs)
-        self.canceledMsgs = "[]"
-        self.save()
-        return msgs
+        return Notification.objects.popUnread(self.user_id)
     
 # User object/model that will be used to push to database
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     firstName = models.CharField(max_length=50)
     lastName = models.CharField(max_length=50)
-    canceledMsgs = models.TextField(default="[]", blank=True)
+
+    class Meta:
+        # Admin account search matches name prefixes
+        indexes = [
+            models.Index(fields=['firstName', 'lastName'], name='userprofile_name_idx'),
+            models.Index(fields=['lastName'], name='userprofile_lastname_idx'),
+        ]
 
     def getAndClearCanceledMsgs(self):
-        msgs = json.loads(self.canceledMsgs)
-        self.canceledMsgs = "[]"
-        self.save()
-        return msgs
+        return Notification.objects.popUnread(self.user_id)
 
     
 # Admin object/model that will be used to push to database
@@ -39,6 +47,55 @@ class AdminProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
 
     
+# Predicate for slots that have not ended yet, evaluated by the database instead of per instance
+def upcomingSlotQ(prefix=''):
+    now = datetime.now()
+    return (models.Q(**{f'{prefix}date__gt': now.date()}) |
+            models.Q(**{f'{prefix}date': now.date(), f'{prefix}endTime__gte': now.time()}))
+
+
+# QuerySet for AppointmentSlot so views can ask the database for upcoming/past slots
+class AppointmentSlotQuerySet(models.QuerySet):
+    def upcoming(self):
+        return self.filter(upcomingSlotQ())
+
+    def past(self):
+        return self.exclude(upcomingSlotQ())
+
+    def withIsPast(self):
+        # Annotate each slot with the same answer isPast() gives, computed in SQL
+        return self.annotate(isPastSlot=models.Case(
+            models.When(upcomingSlotQ(), then=models.Value(False)),
+            default=models.Value(True),
+            output_field=models.BooleanField(),
+        ))
+
+    def markUnbooked(self):
+        # Free every slot in the queryset with one UPDATE, rebuilding searchText the way buildSearchText() does
+        return self.update(isBooked=False, searchText=Substr(Lower(Concat(
+            'appointmentName', models.Value(' unbooked '), 'providerUsername', models.Value(' '),
+            'providerFirstName', models.Value(' '), 'providerLastName',
+            output_field=models.CharField(),
+        )), 1, 500))
+
+    def availabilityByDay(self):
+        # Open and booked slot counts per (date, appointmentType), from one GROUP BY query
+        return (self.order_by()
+                .values('date', 'appointmentType')
+                .annotate(openCount=models.Count('id', filter=models.Q(isBooked=False)),
+                          bookedCount=models.Count('id', filter=models.Q(isBooked=True)))
+                .order_by('date', 'appointmentType'))
+
+
+# QuerySet for Booking that filters on the booked slot's date/time
+class BookingQuerySet(models.QuerySet):
+    def upcoming(self):
+        return self.filter(upcomingSlotQ('slot__'))
+
+    def past(self):
+        return self.exclude(upcomingSlotQ('slot__'))
+
+
 # AppointmentSlot: available slots created by service providers
 class AppointmentSlot(models.Model):
     appointmentName = models.CharField(max_length=100, default="Appointment")
@@ -50,6 +107,20 @@ class AppointmentSlot(models.Model):
     startTime = models.TimeField()
     endTime = models.TimeField()
     isBooked = models.BooleanField(default=False)
+    # The provider* strings above are display copies; ownership and overlap checks go through this key
+    provider = models.ForeignKey(ServiceProvider, on_delete=models.SET_NULL, null=True, blank=True, related_name='slots')
+    # Lowercased "appointment user providerUsername provider" text the dashboard search boxes match against
+    searchText = models.CharField(max_length=500, default='', editable=False)
+
+    objects = AppointmentSlotQuerySet.as_manager()
+
+    class Meta:
+        # Composite indexes for the filters the views and reports run most often
+        indexes = [
+            models.Index(fields=['date', 'isBooked'], name='slot_date_booked_idx'),
+            models.Index(fields=['appointmentType', 'date'], name='slot_type_date_idx'),
+            models.Index(fields=['provider', 'date'], name='slot_providerfk_date_idx'),
+        ]
 
     def isPast(self):
         #Check if this appointment slot is in the past
@@ -65,16 +136,94 @@ class AppointmentSlot(models.Model):
         
         return False
 
+    # Fields that decide whether two slots overlap; saves that don't touch them skip the overlap check
+    scheduleFields = ('provider_id', 'date', 'startTime', 'endTime')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the schedule as loaded so save() can tell whether it changed
+        instance._loadedSchedule = instance.scheduleValues()
+        instance._loadedSearch = instance.searchValues()
+        return instance
+
+    def scheduleValues(self):
+        # Read from __dict__ so deferred fields aren't fetched just to compare them
+        return tuple(self.__dict__.get(field) for field in self.scheduleFields)
+
+    def scheduleChanged(self, updateFields=None):
+        # update_fields may name the provider as 'provider' or 'provider_id'
+        if updateFields is not None and not {self._meta.get_field(field).attname for field in updateFields} & set(self.scheduleFields):
+            return False
+        if self.pk is None or not hasattr(self, '_loadedSchedule'):
+            return True
+        return self.scheduleValues() != self._loadedSchedule
+
+    # Fields copied into searchText, plus the booked user's name which is kept in sync by signals
+    searchFields = ('appointmentName', 'providerUsername', 'providerFirstName', 'providerLastName')
+
+    def buildSearchText(self, userName='Unbooked'):
+        return f"{self.appointmentName} {userName} {self.providerUsername} {self.providerFirstName} {self.providerLastName}".lower()[:500]
+
+    def bookedUserName(self):
+        # Only booked slots need a query for the user's name
+        if self.pk is None or not self.isBooked:
+            return 'Unbooked'
+        user = User.objects.filter(booking__slot_id=self.pk).only('first_name', 'last_name').first()
+        return user.get_full_name() if user else 'Unbooked'
+
+    def searchValues(self):
+        return tuple(self.__dict__.get(field) for field in self.searchFields)
+
+    def searchChanged(self, updateFields=None):
+        if updateFields is not None and not set(updateFields) & set(self.searchFields):
+            return False
+        if self.pk is None or not hasattr(self, '_loadedSearch'):
+            return True
+        return self.searchValues() != self._loadedSearch
+
+    @classmethod
+    def syncSearchText(cls, slotId, userName='Unbooked'):
+        # Rewrite one slot's searchText after its booking changed, without loading or re-saving the slot
+        slot = cls.objects.filter(pk=slotId).only(*cls.searchFields).first()
+        if slot:
+            cls.objects.filter(pk=slotId).update(searchText=slot.buildSearchText(userName))
+
+    @staticmethod
+    def lockSchedule(providerId):
+        # Adding slots locks the provider row first (call inside transaction.atomic()), so two concurrent
+        # submissions for one provider can't both pass the overlap check and both insert
+        if providerId is not None:
+            ServiceProvider.objects.select_for_update().filter(pk=providerId).only('id').first()
+
     def save(self, *args, **kwargs):
-        # Check if any overlapping appointment exists for this provider on this date
-        overlapping = AppointmentSlot.objects.filter(providerUsername=self.providerUsername,date=self.date).exclude(pk=self.pk)
-        
-        # Check for time overlap: two time slots overlap if one starts before the other ends
-        for existing_slot in overlapping:
-            if (self.startTime < existing_slot.endTime and self.endTime > existing_slot.startTime):
-                raise Exception(f"Time conflict: You already have an appointment from {existing_slot.startTime.strftime('%H:%M')} to {existing_slot.endTime.strftime('%H:%M')} on this date.")
-        
-        super().save(*args, **kwargs)
+        updateFields = kwargs.get('update_fields')
+        if self.provider_id is None and updateFields is None:
+            # Slots added without a provider (e.g. through Django admin) belong to the provider their username names
+            self.provider = ServiceProvider.objects.filter(user__username=self.providerUsername).first()
+
+        if self.searchChanged(updateFields):
+            self.searchText = self.buildSearchText(self.bookedUserName())
+            if updateFields is not None:
+                kwargs['update_fields'] = set(updateFields) | {'searchText'}
+
+        # A slot with no provider isn't on anyone's schedule, so there is nothing for it to overlap
+        if self.provider_id is None or not self.scheduleChanged(kwargs.get('update_fields')):
+            super().save(*args, **kwargs)
+        else:
+            with transaction.atomic():
+                self.lockSchedule(self.provider_id)
+                # Check for time overlap in SQL: two time slots overlap if one starts before the other ends
+                overlapping = (AppointmentSlot.objects
+                               .filter(provider_id=self.provider_id, date=self.date, startTime__lt=self.endTime, endTime__gt=self.startTime)
+                               .exclude(pk=self.pk)
+                               .only('startTime', 'endTime')
+                               .first())
+                if overlapping:
+                    raise Exception(f"Time conflict: You already have an appointment from {overlapping.startTime.strftime('%H:%M')} to {overlapping.endTime.strftime('%H:%M')} on this date.")
+                super().save(*args, **kwargs)
+        self._loadedSchedule = self.scheduleValues()
+        self._loadedSearch = self.searchValues()
 
 # Booking: booked slots by users
 class Booking(models.Model):
@@ -82,4 +231,104 @@ class Booking(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     bookedAt = models.DateTimeField(auto_now_add=True)
 
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        # Covers "this user's bookings" lookups and hands slot ids straight to the slot join
+        indexes = [
+            models.Index(fields=['user', 'slot'], name='booking_user_slot_idx'),
+        ]
+
+
+# Cancellation: one row per canceled booking or slot, kept for the admin analytics after the slot/booking is gone
+class Cancellation(models.Model):
+    canceledByChoices = [('user', 'User'), ('provider', 'Provider'), ('admin', 'Administrator'),]
+    provider = models.ForeignKey(ServiceProvider, on_delete=models.SET_NULL, null=True, blank=True, related_name='cancellations')
+    providerUsername = models.CharField(max_length=150)
+    appointmentType = models.CharField(max_length=100)
+    slotDate = models.DateField()
+    wasBooked = models.BooleanField(default=True)
+    canceledBy = models.CharField(max_length=10, choices=canceledByChoices)
+    canceledAt = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Analytics count cancellations over a canceledAt range
+        indexes = [
+            models.Index(fields=['canceledAt'], name='cancellation_canceledat_idx'),
+        ]
+
+    @classmethod
+    def forSlot(cls, slot, canceledBy, wasBooked=True):
+        # Unsaved row describing the slot, for create()/bulk_create() by the caller
+        return cls(provider_id=slot.provider_id, providerUsername=slot.providerUsername, appointmentType=slot.appointmentType,
+                   slotDate=slot.date, wasBooked=wasBooked, canceledBy=canceledBy)
+
+
+# ReportJob: CSV report requested by an admin and generated in the background by the report worker
+class ReportJob(models.Model):
+    reportTypeChoices = [('user', 'User'), ('allUsers', 'All Users'), ('provider', 'Provider'), ('allProviders', 'All Providers'),]
+    statusChoices = [('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'),]
+    reportType = models.CharField(max_length=20, choices=reportTypeChoices)
+    username = models.CharField(max_length=150, blank=True)
+    startDate = models.DateField()
+    endDate = models.DateField()
+    appointmentType = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=10, choices=statusChoices, default='pending')
+    requestedBy = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reportJobs')
+    createdAt = models.DateTimeField(auto_now_add=True)
+    startedAt = models.DateTimeField(null=True, blank=True)
+    finishedAt = models.DateTimeField(null=True, blank=True)
+    fileName = models.CharField(max_length=255, blank=True)
+    rowCount = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        # The worker polls for the oldest pending jobs
+        indexes = [
+            models.Index(fields=['status', 'createdAt'], name='reportjob_status_created_idx'),
+        ]
+
+    def filePath(self):
+        # Finished reports are stored on disk as "<job id>_<report file name>"
+        return Path(settings.REPORT_JOB_DIR) / f"{self.id}_{self.fileName}"
+
+
+# QuerySet for Notification with the dashboard's read/clear and fan-out operations
+class NotificationQuerySet(models.QuerySet):
+    def unread(self, user):
+        return self.filter(recipient=user, isRead=False)
+
+    def hasUnread(self, user):
+        return self.unread(user).exists()
+
+    def popUnread(self, user):
+        # Return the user's unread notices oldest first and mark them read.
+        # Most dashboard loads have none, and stop at one EXISTS query without opening a transaction.
+        if not self.hasUnread(user):
+            return []
+        with transaction.atomic():
+            # Locking the rows makes a second tab loading at the same moment wait, then find them already read
+            unread = list(self.unread(user).select_for_update().order_by('createdAt', 'id').values_list('id', 'text'))
+            if unread:
+                self.filter(id__in=[notificationId for notificationId, _ in unread]).update(isRead=True)
+        return [text for _, text in unread]
+
+    def notify(self, messages):
+        # Insert many (recipient user id, text) notices in one statement
+        return self.bulk_create([self.model(recipient_id=recipientId, text=text) for recipientId, text in messages])
+
+
+# Notification: cancellation notices shown once on the recipient's dashboard
+class Notification(models.Model):
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    text = models.TextField()
+    createdAt = models.DateTimeField(auto_now_add=True)
+    isRead = models.BooleanField(default=False)
+
+    objects = NotificationQuerySet.as_manager()
 
+    class Meta:
+        # Dashboards look up a recipient's unread notices on every load
+        indexes = [
+            models.Index(fields=['recipient', 'isRead'], name='notification_unread_idx'),
+        ]
@@ -0,0 +1,19 @@
+import os
+
+
+# Entry points for the report worker's pool processes. Under the spawn start method (the default on Windows and
+# macOS) every pool process imports this module before anything else has run, so it must not import Django models
+# at the top level: the initializer sets Django up first and runReportJob only imports website.reports after that.
+
+def initWorkerProcess(settingsModule):
+    os.environ['DJANGO_SETTINGS_MODULE'] = settingsModule
+    import django
+    django.setup()
+    from django.db import connections
+    # Forked processes must not reuse database connections inherited from the parent
+    connections.close_all()
+
+
+def runReportJob(jobId):
+    from .reports import runReportJob as run
+    return run(jobId)
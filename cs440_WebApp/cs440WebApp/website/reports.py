@@ -0,0 +1,97 @@
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from . import reportWorker
+from .models import ReportJob
+from .utils import userAppointmentsReport, allUsersReport, providerAppointmentsReport, allProvidersReport
+
+
+# Background report jobs: admins queue a ReportJob, the runReportWorker command builds the CSV in a process pool
+
+def buildReport(job):
+    # Same report builders the download views stream, selected by the job's report type
+    appointmentType = job.appointmentType or None
+    if job.reportType == 'user':
+        return userAppointmentsReport(job.username, job.startDate, job.endDate, appointmentType)
+    if job.reportType == 'allUsers':
+        return allUsersReport(job.startDate, job.endDate, appointmentType)
+    if job.reportType == 'provider':
+        return providerAppointmentsReport(job.username, job.startDate, job.endDate)
+    if job.reportType == 'allProviders':
+        return allProvidersReport(job.startDate, job.endDate, appointmentType)
+    raise ValueError(f"Unknown report type: {job.reportType}")
+
+
+def runReportJob(jobId):
+    # Runs inside a pool process (through reportWorker.runReportJob): write the report to disk and record the outcome on the job
+    job = ReportJob.objects.get(id=jobId)
+    try:
+        report = buildReport(job)
+        if report is None:
+            raise ValueError("User or provider not found.")
+        fileName, header, rows = report
+        job.fileName = fileName
+        Path(settings.REPORT_JOB_DIR).mkdir(parents=True, exist_ok=True)
+        rowCount = 0
+        with open(job.filePath(), 'w', newline='') as reportFile:
+            writer = csv.writer(reportFile)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow(row)
+                rowCount += 1
+        job.rowCount = rowCount
+        job.status = 'done'
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+    finally:
+        job.finishedAt = timezone.now()
+        job.save(update_fields=['fileName', 'rowCount', 'status', 'error', 'finishedAt'])
+        connections.close_all()
+    return job.status
+
+
+def claimPendingJobs(limit):
+    # Move up to 'limit' of the oldest pending jobs to running; the conditional update keeps two workers off the same job
+    claimed = []
+    pendingIds = ReportJob.objects.filter(status='pending').order_by('createdAt').values_list('id', flat=True)[:limit]
+    for jobId in list(pendingIds):
+        if ReportJob.objects.filter(id=jobId, status='pending').update(status='running', startedAt=timezone.now()):
+            claimed.append(jobId)
+    return claimed
+
+
+def reclaimStaleJobs():
+    # Jobs left 'running' by a worker that died are queued again once they are older than REPORT_JOB_TIMEOUT
+    cutoff = timezone.now() - timedelta(seconds=settings.REPORT_JOB_TIMEOUT)
+    return ReportJob.objects.filter(status='running', startedAt__lt=cutoff).update(status='pending', startedAt=None)
+
+
+def failUnfinishedJobs(jobIds, error):
+    # Claimed jobs that never recorded an outcome; leaving them 'running' would hide them from every worker
+    return ReportJob.objects.filter(id__in=jobIds, status='running').update(status='failed', error=error, finishedAt=timezone.now())
+
+
+def processPendingJobs(pool, batchSize):
+    # Claim one batch of jobs, run them across the pool and wait for them to finish
+    jobIds = claimPendingJobs(batchSize)
+    # Close the parent's connections before the pool forks new processes
+    connections.close_all()
+    try:
+        return dict(zip(jobIds, pool.map(reportWorker.runReportJob, jobIds)))
+    except BrokenProcessPool:
+        # A pool process died or couldn't start; the caller has to replace the pool
+        failUnfinishedJobs(jobIds, "The report worker process exited before finishing this report.")
+        raise
+
+
+def createWorkerPool(processes):
+    # Pool processes import only website.reportWorker until Django is set up (see that module)
+    return ProcessPoolExecutor(max_workers=processes, initializer=reportWorker.initWorkerProcess,
+                               initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'cs440WebApp.settings'),))
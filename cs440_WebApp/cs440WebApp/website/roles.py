@@ -0,0 +1,140 @@
+import time
+from django.core.cache import cache
+from django.db import router
+from django.utils.functional import SimpleLazyObject
+from .models import AdminProfile, ServiceProvider, User, UserProfile
+
+
+# Role resolution: which profiles a logged-in user has is worked out once per login with one joined query,
+# kept in the session, and exposed as request.role by RoleMiddleware. The role decorators and dashboards read
+# request.role instead of probing hasattr(user, 'userprofile') / 'serviceprovider' and re-fetching the profile.
+# Saving or deleting a profile (e.g. through Django admin) sets a new role version for the user in the shared
+# cache (see signals.py), which makes every session holding the old copy resolve it again.
+ROLE_SESSION_KEY = '_roleInfo'
+ROLE_VERSION_KEY = 'role:version:{}'
+
+# (role name, profile model, reverse accessor on User)
+PROFILE_MODELS = (
+    ('user', UserProfile, 'userprofile'),
+    ('provider', ServiceProvider, 'serviceprovider'),
+    ('admin', AdminProfile, 'adminprofile'),
+)
+
+
+def profileFields(model):
+    # Concrete fields copied into the session; the user key is filled in from the logged-in user
+    return [field.name for field in model._meta.concrete_fields if field.name != 'user']
+
+
+def newRoleVersion():
+    # Versions only go up, so a new one never matches a copy some session stored earlier
+    return time.time_ns()
+
+
+def getRoleVersion(userId):
+    # The cache culls entries, so a missing version may be a bump that was evicted. Start a new one instead of
+    # assuming nothing changed: every session then resolves its roles again once, rather than keeping a removed role.
+    key = ROLE_VERSION_KEY.format(userId)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, newRoleVersion(), None)
+        version = cache.get(key)
+    return version
+
+
+def bumpRoleVersion(userId):
+    cache.set(ROLE_VERSION_KEY.format(userId), newRoleVersion(), None)
+
+
+def resolveRoleInfo(user):
+    # Read the version first: a profile change that lands during the query then leaves the session out of date
+    version = getRoleVersion(user.pk)
+    # One query with a LEFT JOIN per profile table instead of one reverse-OneToOne probe per role
+    lookups = [f"{accessor}__{name}" for _, model, accessor in PROFILE_MODELS for name in profileFields(model)]
+    row = User.objects.filter(pk=user.pk).values(*lookups).first() or {}
+    profiles = {}
+    for role, model, accessor in PROFILE_MODELS:
+        values = {name: row.get(f"{accessor}__{name}") for name in profileFields(model)}
+        if values.get('id') is not None:
+            profiles[role] = values
+    return {'userId': user.pk, 'version': version, 'profiles': profiles}
+
+
+def storeRoleInfo(request, user):
+    roleInfo = resolveRoleInfo(user)
+    request.session[ROLE_SESSION_KEY] = roleInfo
+    return roleInfo
+
+
+class RequestRole:
+    """The current user's roles and profiles, built from the session without touching the profile tables"""
+
+    def __init__(self, user, roleInfo):
+        self.user = user
+        self.profiles = roleInfo['profiles'] if roleInfo else {}
+
+    @property
+    def isUser(self):
+        return 'user' in self.profiles
+
+    @property
+    def isProvider(self):
+        return 'provider' in self.profiles
+
+    @property
+    def isAdmin(self):
+        return self.user.is_superuser or self.user.is_staff or 'admin' in self.profiles
+
+    @property
+    def name(self):
+        # Same precedence the login redirect has always used
+        if self.user.is_superuser or self.user.is_staff:
+            return 'admin'
+        if self.isProvider:
+            return 'provider'
+        if self.isUser:
+            return 'user'
+        return 'admin' if self.isAdmin else None
+
+    def profile(self, role):
+        # Rebuild the profile instance from the session copy, with its user already attached
+        values = self.profiles.get(role)
+        if values is None:
+            return None
+        model = dict((name, model) for name, model, _ in PROFILE_MODELS)[role]
+        values = dict(values, user=self.user.pk)
+        # from_db() expects the values in the model's field order
+        fields = model._meta.concrete_fields
+        instance = model.from_db(router.db_for_read(model), [f.attname for f in fields], [values[f.name] for f in fields])
+        instance.user = self.user
+        return instance
+
+    @property
+    def userProfile(self):
+        return self.profile('user')
+
+    @property
+    def providerProfile(self):
+        return self.profile('provider')
+
+
+def getRequestRole(request):
+    user = request.user
+    if not user.is_authenticated:
+        return RequestRole(user, None)
+    roleInfo = request.session.get(ROLE_SESSION_KEY)
+    # Sessions from before this cache, belonging to another user, or holding a since-edited profile are resolved again
+    if not roleInfo or roleInfo.get('userId') != user.pk or roleInfo.get('version') != getRoleVersion(user.pk):
+        roleInfo = storeRoleInfo(request, user)
+    return RequestRole(user, roleInfo)
+
+
+def attachRole(request):
+    request.role = SimpleLazyObject(lambda: getRequestRole(request))
+
+
+def requestRole(request):
+    # Requests that didn't pass through RoleMiddleware (e.g. RequestFactory in tests) resolve on demand
+    if not hasattr(request, 'role'):
+        attachRole(request)
+    return request.role
@@ -0,0 +1,72 @@
+from functools import partial
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .caching import bumpDashboardVersion, clearAppointmentTypes
+from .models import AdminProfile, AppointmentSlot, Booking, ServiceProvider, UserProfile
+from .roles import attachRole, bumpRoleVersion, storeRoleInfo
+
+
+def onCommitOnce(callback, origin=None):
+    # delete() sends post_delete for every row it removes, cascades included, all with the same origin:
+    # queue the callback once per delete() rather than once per row. Saves pass no origin and always queue.
+    if origin is not None:
+        connection = transaction.get_connection()
+        if any(getattr(func, 'origin', None) is origin and func.func is callback for _, func, _ in connection.run_on_commit):
+            return
+        callback = partial(callback)
+        callback.origin = origin
+    transaction.on_commit(callback)
+
+
+# Any slot or booking change invalidates the cached dashboard fragments.
+# bulk_create/update() don't send these signals, so callers using them bump the version themselves.
+@receiver(post_save, sender=AppointmentSlot)
+@receiver(post_delete, sender=AppointmentSlot)
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidateDashboardCache(sender, origin=None, **kwargs):
+    # Wait for the commit so a concurrent request can't cache the old data under the new version
+    onCommitOnce(bumpDashboardVersion, origin)
+
+
+# A new or deleted slot may add or remove an appointment type
+@receiver(post_save, sender=AppointmentSlot)
+@receiver(post_delete, sender=AppointmentSlot)
+def invalidateAppointmentTypes(sender, created=True, origin=None, **kwargs):
+    if created:
+        onCommitOnce(clearAppointmentTypes, origin)
+
+
+# Keep the slot's searchText in step with who booked it
+@receiver(post_save, sender=Booking)
+def updateSearchTextOnBook(sender, instance, created, **kwargs):
+    if created:
+        AppointmentSlot.syncSearchText(instance.slot_id, instance.user.get_full_name())
+
+
+@receiver(post_delete, sender=Booking)
+def updateSearchTextOnCancel(sender, instance, origin=None, **kwargs):
+    # Slot cascades and queryset deletes (bulk admin operations) update the slots themselves
+    if origin is instance:
+        AppointmentSlot.syncSearchText(instance.slot_id)
+
+
+# Role resolution: resolve once at login, and make sessions re-resolve after a profile is added, edited or removed
+@receiver(user_logged_in)
+def cacheRoleOnLogin(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, 'session'):
+        storeRoleInfo(request, user)
+        # Replace any request.role built while the request was still anonymous
+        attachRole(request)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=ServiceProvider)
+@receiver(post_delete, sender=ServiceProvider)
+@receiver(post_save, sender=AdminProfile)
+@receiver(post_delete, sender=AdminProfile)
+def invalidateRole(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bumpRoleVersion(instance.user_id))
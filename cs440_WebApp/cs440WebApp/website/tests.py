@@ -1,3 +1,941 @@
-from django.test import TestCase
+import json
+import subprocess
+import sys
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, time, timedelta
+from io import StringIO
+from types import SimpleNamespace
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth.models import User
+from .models import ServiceProvider, UserProfile, AppointmentSlot, Booking, Notification, ReportJob
+from .caching import bumpDashboardVersion, clearAppointmentTypes, getAppointmentTypes, getDashboardVersion
+from .utils import availabilityCounts, countAccounts, deleteAccounts, filterAppointmentSlots, filterUsers, formatAppointments, generateProviderAppointmentsCsv, generateAllProvidersReport, paginateByKeyset
+from .analytics import adminAnalytics
+from .booking import BookingError, bookSlot, cancelSlots
+from . import metrics
+from .db.pool import ConnectionPool, PoolTimeout
+from .forms import AppointmentSlotForm, RecurringSlotForm
+from .middleware import ProfilingMiddleware
+from .reports import processPendingJobs, reclaimStaleJobs
+from .roles import ROLE_VERSION_KEY
 
-# Create your tests here.
+
+# The test cache lives as long as the test run; every test starts from an empty one, as it does from an empty database
+class FreshCacheMixin:
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+# Shared helpers for creating providers, users and slots in tests
+def createProvider(username, firstName='Pat', lastName='Smith', category='Medical'):
+    user = User.objects.create_user(username=username, password='testpass123', first_name=firstName, last_name=lastName)
+    return ServiceProvider.objects.create(user=user, category=category, firstName=firstName, lastName=lastName)
+
+def createUser(username, firstName='Ann', lastName='Lee'):
+    user = User.objects.create_user(username=username, password='testpass123', first_name=firstName, last_name=lastName)
+    UserProfile.objects.create(user=user, firstName=firstName, lastName=lastName)
+    return user
+
+def createSlot(provider, slotDate, startHour, appointmentName='Checkup'):
+    return AppointmentSlot.objects.create(
+        appointmentName=appointmentName,
+        appointmentType=provider.category,
+        provider=provider,
+        providerUsername=provider.user.username,
+        providerFirstName=provider.firstName,
+        providerLastName=provider.lastName,
+        date=slotDate,
+        startTime=time(startHour),
+        endTime=time(startHour, 45),
+    )
+
+
+class ProviderReportQueryCountTests(FreshCacheMixin, TestCase):
+    # Provider CSV exports must run a constant number of queries no matter how many slots they cover
+    def setUp(self):
+        super().setUp()
+        self.provider = createProvider('provider1')
+        self.user = createUser('user1')
+        self.startDate = date.today()
+        self.endDate = date.today() + timedelta(days=30)
+
+    def addSlots(self, count, dayOffset):
+        for i in range(count):
+            slot = createSlot(self.provider, date.today() + timedelta(days=dayOffset), 8 + i)
+            # Book every other slot so the export has to join bookings and users
+            if i % 2 == 0:
+                slot.isBooked = True
+                slot.save()
+                Booking.objects.create(slot=slot, user=self.user)
+
+    def exportLines(self, generateReport, expectedQueries):
+        # Consume the streamed response inside the query-count check, since rows are fetched while streaming
+        with self.assertNumQueries(expectedQueries):
+            response = generateReport()
+            return b''.join(response.streaming_content).decode().splitlines()
+
+    def assertConstantQueries(self, generateReport, expectedQueries):
+        self.addSlots(2, 1)
+        smallLines = self.exportLines(generateReport, expectedQueries)
+        self.addSlots(8, 2)
+        largeLines = self.exportLines(generateReport, expectedQueries)
+        self.assertEqual(len(smallLines), 3)
+        self.assertEqual(len(largeLines), 11)
+        self.assertIn('Ann Lee', '\n'.join(largeLines))
+
+    def testProviderReportQueryCountIsConstant(self):
+        # One query for the provider lookup, one for the joined slot/booking/user rows
+        self.assertConstantQueries(lambda: generateProviderAppointmentsCsv('provider1', self.startDate, self.endDate), 2)
+
+    def testAllProvidersReportQueryCountIsConstant(self):
+        self.assertConstantQueries(lambda: generateAllProvidersReport(self.startDate, self.endDate), 1)
+
+
+class BookSlotTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.provider = createProvider('provider1')
+        self.user = createUser('user1')
+        self.slotDate = date.today() + timedelta(days=1)
+
+    def testBookingClaimsSlot(self):
+        slot = createSlot(self.provider, self.slotDate, 9)
+        booking = bookSlot(slot.id, self.user)
+        slot.refresh_from_db()
+        self.assertTrue(slot.isBooked)
+        self.assertEqual(booking.slot_id, slot.id)
+
+    def testAlreadyBookedSlotIsRejected(self):
+        slot = createSlot(self.provider, self.slotDate, 9)
+        bookSlot(slot.id, self.user)
+        with self.assertRaisesMessage(BookingError, "already been booked"):
+            bookSlot(slot.id, createUser('user2'))
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def testOverlappingBookingRollsBackClaim(self):
+        first = createSlot(self.provider, self.slotDate, 9)
+        otherProvider = createProvider('provider2', firstName='Sam', lastName='Jones')
+        overlapping = AppointmentSlot.objects.create(
+            appointmentName='Training', appointmentType='Fitness', providerUsername='provider2',
+            providerFirstName='Sam', providerLastName='Jones', date=self.slotDate,
+            startTime=time(9, 30), endTime=time(10, 15),
+        )
+        bookSlot(first.id, self.user)
+        with self.assertRaisesMessage(BookingError, "Conflicting appointment"):
+            bookSlot(overlapping.id, self.user)
+        overlapping.refresh_from_db()
+        self.assertFalse(overlapping.isBooked)
+
+    def testMissingSlotIsRejected(self):
+        with self.assertRaisesMessage(BookingError, "no longer available"):
+            bookSlot(0, self.user)
+
+    def testSlotIsOnlyReadAfterTheClaim(self):
+        # The slot's times come from the claimed row inside the transaction, not from a read before the UPDATE
+        slot = createSlot(self.provider, self.slotDate, 9)
+        with CaptureQueriesContext(connection) as queries:
+            bookSlot(slot.id, self.user)
+        slotQueries = [q['sql'] for q in queries if 'website_appointmentslot' in q['sql']]
+        self.assertTrue(slotQueries[0].startswith('UPDATE'))
+        # Next is the overlap check, which reads the claimed slot's date and times through subqueries
+        self.assertIn('website_booking', slotQueries[1].split('WHERE')[0])
+
+
+class BookSlotConcurrencyTests(FreshCacheMixin, TransactionTestCase):
+    # Concurrent bookings: one slot can only be booked once, and one user can't end up with overlapping bookings
+    threadCount = 12
+
+    def testOneSlotManyThreads(self):
+        provider = createProvider('provider1')
+        slot = createSlot(provider, date.today() + timedelta(days=1), 9)
+        users = [createUser(f'user{i}') for i in range(self.threadCount)]
+        barrier = threading.Barrier(self.threadCount)
+        results = []
+
+        def attempt(user):
+            barrier.wait()
+            try:
+                bookSlot(slot.id, user)
+                results.append('booked')
+            except BookingError:
+                results.append('rejected')
+            except DatabaseError:
+                # SQLite reports lock contention as an error instead of waiting; it still isn't a booking
+                results.append('rejected')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count('booked'), 1)
+        self.assertEqual(Booking.objects.filter(slot=slot).count(), 1)
+        slot.refresh_from_db()
+        self.assertTrue(slot.isBooked)
+
+    def testOneUserManyOverlappingSlots(self):
+        # One user races for different slots at the same time; the overlap check may only let one through
+        user = createUser('user1')
+        slotDate = date.today() + timedelta(days=1)
+        slots = [createSlot(createProvider(f'provider{i}'), slotDate, 9) for i in range(self.threadCount)]
+        barrier = threading.Barrier(self.threadCount)
+        results = []
+
+        def attempt(slot):
+            barrier.wait()
+            try:
+                bookSlot(slot.id, user)
+                results.append('booked')
+            except (BookingError, DatabaseError):
+                results.append('rejected')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(slot,)) for slot in slots]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count('booked'), 1)
+        self.assertEqual(Booking.objects.filter(user=user).count(), 1)
+        self.assertEqual(AppointmentSlot.objects.filter(isBooked=True).count(), 1)
+
+
+class SlotOwnershipTests(FreshCacheMixin, TestCase):
+    # The provider key decides who owns a slot, including slots added without one (e.g. through Django admin)
+    def setUp(self):
+        super().setUp()
+        self.provider = createProvider('provider1')
+        self.slotDate = date.today() + timedelta(days=1)
+        self.client.force_login(self.provider.user)
+
+    def slotWithoutProvider(self, startHour):
+        return AppointmentSlot.objects.create(
+            appointmentName='Checkup', appointmentType='Medical', providerUsername='provider1', providerFirstName='Pat',
+            providerLastName='Smith', date=self.slotDate, startTime=time(startHour), endTime=time(startHour, 45),
+        )
+
+    def testSlotWithoutProviderIsOwnedByItsUsername(self):
+        slot = self.slotWithoutProvider(9)
+        self.assertEqual(slot.provider, self.provider)
+        response = self.client.get(reverse('providerDashboard'))
+        self.assertEqual([row['slotId'] for row in response.context['slots']], [slot.id])
+        self.client.get(reverse('cancelAppointment', args=[slot.id]))
+        self.assertFalse(AppointmentSlot.objects.filter(id=slot.id).exists())
+
+    def testSlotWithNullProviderDoesNotBlockSchedule(self):
+        # A slot left without a provider (its provider was removed) shows on no dashboard, so it can't block one either
+        orphan = self.slotWithoutProvider(9)
+        AppointmentSlot.objects.filter(id=orphan.id).update(provider=None)
+        slot = createSlot(self.provider, self.slotDate, 9)
+        response = self.client.get(reverse('providerDashboard'))
+        self.assertEqual([row['slotId'] for row in response.context['slots']], [slot.id])
+
+    def testOverlapIsCheckedByProvider(self):
+        self.slotWithoutProvider(9)
+        with self.assertRaisesMessage(Exception, "Time conflict"):
+            createSlot(self.provider, self.slotDate, 9)
+
+
+class NotificationTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.first = createUser('user1')
+        self.second = createUser('user2')
+
+    def testNotifyFansOutInOneInsert(self):
+        with self.assertNumQueries(1):
+            Notification.objects.notify([(self.first.id, 'one'), (self.second.id, 'two'), (self.first.id, 'three')])
+        self.assertEqual(Notification.objects.unread(self.first).count(), 2)
+        self.assertEqual(list(Notification.objects.unread(self.second).values_list('text', flat=True)), ['two'])
+
+    def testPopReturnsOldestFirstAndMarksRead(self):
+        Notification.objects.notify([(self.first.id, 'one'), (self.first.id, 'two'), (self.second.id, 'other')])
+        self.assertEqual(Notification.objects.popUnread(self.first), ['one', 'two'])
+        self.assertFalse(Notification.objects.hasUnread(self.first))
+        self.assertEqual(Notification.objects.popUnread(self.first), [])
+        # Other recipients' notices are left unread
+        self.assertTrue(Notification.objects.hasUnread(self.second))
+
+    def testPopWithNothingUnreadIsOneQuery(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(Notification.objects.popUnread(self.first), [])
+
+
+class UpcomingPastTests(FreshCacheMixin, TestCase):
+    # upcoming()/past() split slots and bookings the way isPast() does: a slot is past once its end time has gone by
+    def setUp(self):
+        super().setUp()
+        self.provider = createProvider('provider1')
+        today = date.today()
+        self.yesterday = self.slotAt(today - timedelta(days=1), time(9), time(10))
+        self.endedToday = self.slotAt(today, time(0), time(0, 0, 1))
+        self.laterToday = self.slotAt(today, time(23), time(23, 59, 59))
+        self.tomorrow = self.slotAt(today + timedelta(days=1), time(9), time(10))
+        self.user = createUser('user1')
+        for slot in (self.yesterday, self.laterToday):
+            Booking.objects.create(slot=slot, user=self.user)
+
+    def slotAt(self, slotDate, startTime, endTime):
+        return AppointmentSlot.objects.create(
+            provider=self.provider, providerUsername='provider1', date=slotDate, startTime=startTime, endTime=endTime,
+        )
+
+    def testSlotsSplitOnEndTime(self):
+        upcoming = set(AppointmentSlot.objects.upcoming().values_list('id', flat=True))
+        past = set(AppointmentSlot.objects.past().values_list('id', flat=True))
+        self.assertEqual(upcoming, {self.laterToday.id, self.tomorrow.id})
+        self.assertEqual(past, {self.yesterday.id, self.endedToday.id})
+        # The SQL answers agree with isPast() on every slot
+        for slot in AppointmentSlot.objects.withIsPast():
+            self.assertEqual(slot.isPastSlot, slot.isPast())
+            self.assertEqual(slot.isPastSlot, slot.id in past)
+
+    def testBookingsFollowTheirSlots(self):
+        self.assertEqual([booking.slot_id for booking in Booking.objects.upcoming()], [self.laterToday.id])
+        self.assertEqual([booking.slot_id for booking in Booking.objects.past()], [self.yesterday.id])
+
+
+class SlotFilterTests(FreshCacheMixin, TestCase):
+    # The dashboard search/type/date filters run as database lookups, with the booked user joined in the same query
+    def setUp(self):
+        super().setUp()
+        self.slotDate = date.today() + timedelta(days=1)
+        medical = createProvider('provider1')
+        beauty = createProvider('provider2', firstName='Sam', lastName='Jones', category='Beauty')
+        self.checkup = createSlot(medical, self.slotDate, 9)
+        self.haircut = createSlot(beauty, self.slotDate, 9, appointmentName='Haircut')
+        self.later = createSlot(medical, self.slotDate + timedelta(days=1), 9)
+        bookSlot(self.haircut.id, createUser('user1', firstName='Ann', lastName='Lee'))
+
+    def filteredIds(self, search='', typeFilter='', dateFilter=''):
+        slots = filterAppointmentSlots(AppointmentSlot.objects.order_by('id'), search, typeFilter, dateFilter)
+        return [slot.id for slot in slots]
+
+    def testSearchMatchesNameUserAndProvider(self):
+        self.assertEqual(self.filteredIds('haircut'), [self.haircut.id])
+        self.assertEqual(self.filteredIds('  Ann Lee '), [self.haircut.id])
+        self.assertEqual(self.filteredIds('pat smith'), [self.checkup.id, self.later.id])
+        self.assertEqual(self.filteredIds('unbooked'), [self.checkup.id, self.later.id])
+
+    def testTypeAndDateFilters(self):
+        self.assertEqual(self.filteredIds(typeFilter='Beauty'), [self.haircut.id])
+        self.assertEqual(self.filteredIds(dateFilter=self.slotDate.isoformat()), [self.checkup.id, self.haircut.id])
+        self.assertEqual(self.filteredIds('checkup', 'Medical', self.slotDate.isoformat()), [self.checkup.id])
+        self.assertEqual(self.filteredIds(dateFilter='not-a-date'), [])
+
+    def testFormattingNeedsNoExtraQueries(self):
+        with self.assertNumQueries(1):
+            rows = formatAppointments(filterAppointmentSlots(AppointmentSlot.objects.order_by('id')))
+        self.assertEqual([(row['userName'], row['isPast']) for row in rows], [('Unbooked', False), ('Ann Lee', False), ('Unbooked', False)])
+
+
+class SlotOverlapCheckTests(FreshCacheMixin, TestCase):
+    # save() only runs the overlap query when the provider, date or times may have changed
+    def setUp(self):
+        super().setUp()
+        self.provider = createProvider('provider1')
+        self.slotDate = date.today() + timedelta(days=1)
+        createSlot(self.provider, self.slotDate, 9)
+        self.slot = AppointmentSlot.objects.get(id=createSlot(self.provider, self.slotDate, 11).id)
+
+    def overlapQueries(self, save):
+        with CaptureQueriesContext(connection) as queries:
+            save()
+        return [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'website_appointmentslot' in q['sql']]
+
+    def testBookedFlagSaveSkipsOverlapQuery(self):
+        self.slot.isBooked = True
+        self.assertEqual(self.overlapQueries(lambda: self.slot.save(update_fields=['isBooked'])), [])
+
+    def testUnchangedScheduleSkipsOverlapQuery(self):
+        self.slot.appointmentName = 'Renamed'
+        self.assertEqual(self.overlapQueries(self.slot.save), [])
+
+    def testEditingTimeStillChecksOverlap(self):
+        self.slot.startTime = time(9, 30)
+        with self.assertRaisesMessage(Exception, "Time conflict"):
+            self.slot.save()
+
+    def testEditingDateStillChecksOverlap(self):
+        other = createSlot(self.provider, self.slotDate + timedelta(days=1), 9)
+        other.date = self.slotDate
+        with self.assertRaisesMessage(Exception, "Time conflict"):
+            other.save(update_fields=['date'])
+
+
+class SearchTextTests(FreshCacheMixin, TestCase):
+    # Booking and canceling rewrite the slot's searchText through signals, so search finds slots by who booked them
+    def setUp(self):
+        super().setUp()
+        self.provider = createProvider('provider1')
+        self.user = createUser('user1', firstName='Ann', lastName='Lee')
+        self.slot = createSlot(self.provider, date.today() + timedelta(days=1), 9)
+
+    def searchText(self):
+        return AppointmentSlot.objects.get(id=self.slot.id).searchText
+
+    def testBookingAddsUserName(self):
+        self.assertIn('unbooked', self.searchText())
+        bookSlot(self.slot.id, self.user)
+        self.assertIn('ann lee', self.searchText())
+        self.assertNotIn('unbooked', self.searchText())
+        self.assertEqual(list(filterAppointmentSlots(AppointmentSlot.objects.all(), 'Ann Lee')), [self.slot])
+
+    def testUserCancelRemovesUserName(self):
+        bookSlot(self.slot.id, self.user)
+        self.client.force_login(self.user)
+        self.client.get(reverse('cancelAppointment', args=[self.slot.id]))
+        self.assertFalse(Booking.objects.exists())
+        self.assertIn('unbooked', self.searchText())
+        self.assertNotIn('ann lee', self.searchText())
+
+
+class KeysetPaginationTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # Slots from several providers share dates and start times, so only the id breaks the ties
+        self.slotDate = date.today() + timedelta(days=1)
+        providers = [createProvider(f'provider{i}') for i in range(3)]
+        for dayOffset in range(2):
+            for startHour in (9, 10):
+                for provider in providers:
+                    createSlot(provider, self.slotDate + timedelta(days=dayOffset), startHour)
+        self.expectedIds = list(AppointmentSlot.objects.order_by('date', 'startTime', 'id').values_list('id', flat=True))
+
+    def testWalksEveryPageForwardAndBack(self):
+        queryset = AppointmentSlot.objects.all()
+        pages = [paginateByKeyset(queryset, pageSize=5)]
+        self.assertEqual(pages[0]['prevCursor'], '')
+        while pages[-1]['nextCursor']:
+            pages.append(paginateByKeyset(queryset, after=pages[-1]['nextCursor'], pageSize=5))
+        self.assertEqual([[row.id for row in page['rows']] for page in pages],
+                         [self.expectedIds[i:i + 5] for i in range(0, len(self.expectedIds), 5)])
+
+        # Walking back from the last page returns the same pages in reverse
+        backPages = [pages[-1]]
+        while backPages[-1]['prevCursor']:
+            backPages.append(paginateByKeyset(queryset, before=backPages[-1]['prevCursor'], pageSize=5))
+        self.assertEqual([[row.id for row in page['rows']] for page in reversed(backPages)],
+                         [[row.id for row in page['rows']] for page in pages])
+
+
+class RoleCacheTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.provider = createProvider('provider1')
+        self.client.force_login(self.provider.user)
+
+    def testDashboardReadsRoleFromSession(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('providerDashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q['sql'] for q in queries if 'website_serviceprovider' in q['sql']])
+        self.assertEqual(response.context['provider'].pk, self.provider.pk)
+
+    def testEvictedVersionIsResolvedAgain(self):
+        self.client.get(reverse('providerDashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.provider.delete()
+        # The cache culls the bumped version, so the session's copy must not be trusted again
+        cache.delete(ROLE_VERSION_KEY.format(self.provider.user_id))
+        response = self.client.get(reverse('providerDashboard'))
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+    def testColdCacheResolvesOnce(self):
+        self.client.get(reverse('providerDashboard'))
+        cache.clear()
+        self.client.get(reverse('providerDashboard'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('providerDashboard'))
+        self.assertFalse([q['sql'] for q in queries if 'website_serviceprovider' in q['sql']])
+
+    def testRemovedProfileIsNoticed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.provider.delete()
+        response = self.client.get(reverse('providerDashboard'))
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+
+class AppointmentTypeCacheTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.slotDate = date.today() + timedelta(days=1)
+        createSlot(createProvider('provider1'), self.slotDate, 9)
+        self.beautyProvider = createProvider('provider2', firstName='Sam', lastName='Jones', category='Beauty')
+
+    def testTypesAreCachedUntilASlotChanges(self):
+        self.assertEqual(getAppointmentTypes(), ['Medical'])
+        with self.assertNumQueries(0):
+            self.assertEqual(getAppointmentTypes(), ['Medical'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            slot = createSlot(self.beautyProvider, self.slotDate, 9)
+        self.assertEqual(getAppointmentTypes(), ['Beauty', 'Medical'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            slot.delete()
+        self.assertEqual(getAppointmentTypes(), ['Medical'])
+
+    def testRecurringScheduleClearsTypes(self):
+        self.assertEqual(getAppointmentTypes(), ['Medical'])
+        form = RecurringSlotForm({'appointmentName': 'Haircut', 'startDate': self.slotDate.isoformat(), 'endDate': self.slotDate.isoformat(),
+                                  'daysOfWeek': [str(day) for day in range(7)], 'dayStart': '09:00', 'dayEnd': '10:00', 'slotLength': '60'})
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save(self.beautyProvider)
+        self.assertEqual(getAppointmentTypes(), ['Beauty', 'Medical'])
+
+
+class AvailabilityCalendarTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.provider = createProvider('provider1')
+        self.user = createUser('user1')
+        self.slotDate = date.today() + timedelta(days=1)
+
+    def testCountsComeFromOneQuery(self):
+        createSlot(self.provider, self.slotDate, 9)
+        createSlot(self.provider, self.slotDate, 11)
+        bookSlot(createSlot(self.provider, self.slotDate, 13).id, self.user)
+        createSlot(self.provider, self.slotDate + timedelta(days=1), 9, appointmentName='Later')
+        with self.assertNumQueries(1):
+            counts = availabilityCounts(self.slotDate, self.slotDate)
+        self.assertEqual(counts, [{'date': self.slotDate, 'appointmentType': 'Medical', 'openCount': 2, 'bookedCount': 1}])
+
+    def testCalendarLinksToFilteredSlots(self):
+        createSlot(self.provider, self.slotDate, 9)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('availabilityCalendar'), {'view': 'week', 'start': self.slotDate.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f"dateFilter={self.slotDate.isoformat()}&typeFilter=Medical")
+
+
+class AdminAnalyticsTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.provider = createProvider('provider1')
+        self.user = createUser('user1')
+        self.slotDate = date.today() + timedelta(days=1)
+        bookSlot(createSlot(self.provider, self.slotDate, 9).id, self.user)
+        createSlot(self.provider, self.slotDate, 11)
+        canceled = createSlot(self.provider, self.slotDate, 13)
+        bookSlot(canceled.id, self.user)
+        cancelSlots([canceled.id])
+
+    def testAggregates(self):
+        with self.assertNumQueries(9):
+            analytics = adminAnalytics(date.today(), self.slotDate)
+        self.assertEqual(analytics['totals'], {'totalSlots': 2, 'bookedSlots': 1, 'bookingRate': 50.0})
+        self.assertEqual(analytics['busiestDays'], [{'day': self.slotDate, 'bookings': 1}])
+        self.assertEqual(analytics['byHour'], [{'hour': 9, 'bookings': 1}])
+        self.assertEqual(analytics['cancellations']['byAdmin'], 1)
+        self.assertEqual(analytics['cancellations']['booked'], 1)
+
+    def testDashboardReusesCachedAnalytics(self):
+        self.client.force_login(User.objects.create_superuser('admin1', password='testpass123'))
+        url = reverse('adminDashboard') + f'?view=analytics&startDate={date.today().isoformat()}&endDate={self.slotDate.isoformat()}'
+        self.assertContains(self.client.get(url), "1 of 2 slots booked (50.0%)")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([q['sql'] for q in queries if 'website_appointmentslot' in q['sql']])
+
+
+class BrokenPool:
+    def map(self, function, items):
+        raise BrokenProcessPool("A process in the process pool was terminated abruptly.")
+
+
+class ReportWorkerTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin1', password='testpass123')
+
+    def queueJob(self, **fields):
+        return ReportJob.objects.create(reportType='allUsers', startDate=date.today(), endDate=date.today(), requestedBy=self.admin, **fields)
+
+    def testWorkerEntryPointsImportBeforeDjangoSetup(self):
+        # Spawned pool processes import the module before the initializer has set Django up
+        result = subprocess.run([sys.executable, '-c', "import sys, website.reportWorker; sys.exit('website.models' in sys.modules)"],
+                                cwd=settings.BASE_DIR, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def testBrokenPoolFailsClaimedJobs(self):
+        job = self.queueJob()
+        with self.assertRaises(BrokenProcessPool):
+            processPendingJobs(BrokenPool(), 2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def testStaleRunningJobsAreRequeued(self):
+        stale = self.queueJob(status='running')
+        ReportJob.objects.filter(id=stale.id).update(startedAt=timezone.now() - timedelta(seconds=settings.REPORT_JOB_TIMEOUT + 60))
+        current = self.queueJob(status='running', startedAt=timezone.now())
+        self.assertEqual(reclaimStaleJobs(), 1)
+        stale.refresh_from_db()
+        current.refresh_from_db()
+        self.assertEqual((stale.status, current.status), ('pending', 'running'))
+
+
+class RecurringSlotFormTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.provider = createProvider('provider1')
+        self.startDate = date.today() + timedelta(days=1)
+
+    def scheduleForm(self, endDate, days=None, slotLength='60', dayStart='09:00', dayEnd='11:00'):
+        return RecurringSlotForm({
+            'appointmentName': 'Checkup', 'startDate': self.startDate.isoformat(), 'endDate': endDate.isoformat(),
+            'daysOfWeek': days if days is not None else [str(day) for day in range(7)],
+            'dayStart': dayStart, 'dayEnd': dayEnd, 'slotLength': slotLength,
+        })
+
+    def testCreatesEverySlotAndSkipsOverlaps(self):
+        createSlot(self.provider, self.startDate, 9)
+        form = self.scheduleForm(self.startDate + timedelta(days=6))
+        self.assertTrue(form.is_valid(), form.errors)
+        created, skipped = form.save(self.provider)
+        self.assertEqual((len(created), skipped), (13, 1))
+        self.assertEqual(AppointmentSlot.objects.filter(provider=self.provider).count(), 14)
+
+    def testOnlySelectedWeekdays(self):
+        form = self.scheduleForm(self.startDate + timedelta(days=13), days=[str(self.startDate.weekday())])
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(len(form.slotTimes()), 4)
+
+    def testRejectsLongDateRangeBeforeEnumerating(self):
+        form = self.scheduleForm(date(9999, 12, 31))
+        self.assertFalse(form.is_valid())
+        self.assertIn('endDate', form.errors)
+
+    def testRejectsTooManySlots(self):
+        form = self.scheduleForm(self.startDate + timedelta(days=200), slotLength='15', dayStart='06:00', dayEnd='22:00')
+        self.assertFalse(form.is_valid())
+        self.assertIn(f"more than {RecurringSlotForm.maxSlots} slots", str(form.non_field_errors()))
+        self.assertEqual(len(form.slotTimes(limit=RecurringSlotForm.maxSlots + 1)), RecurringSlotForm.maxSlots + 1)
+
+    def assertLocksProviderFirst(self, save):
+        # The provider row is read (FOR UPDATE where the database supports it) before any slot is checked or written
+        with CaptureQueriesContext(connection) as queries:
+            save()
+        tables = [q['sql'] for q in queries if 'website_' in q['sql']]
+        self.assertIn('website_serviceprovider', tables[0])
+        self.assertTrue(all('website_serviceprovider' not in sql for sql in tables[1:]))
+
+    def testRecurringSaveLocksProviderFirst(self):
+        form = self.scheduleForm(self.startDate)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertLocksProviderFirst(lambda: form.save(self.provider))
+
+    def testSingleSlotSaveLocksProviderFirst(self):
+        form = AppointmentSlotForm({'appointmentName': 'Checkup', 'date': self.startDate.isoformat(), 'startTime': '09:00', 'endTime': '10:00'})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertLocksProviderFirst(lambda: form.save(self.provider))
+
+
+class SlotCreationConcurrencyTests(FreshCacheMixin, TransactionTestCase):
+    # Recurring and single-slot submissions racing for the same hours must never leave overlapping slots
+    threadCount = 8
+
+    def testRecurringAndSingleSubmissionsDontOverlap(self):
+        provider = createProvider('provider1')
+        slotDate = (date.today() + timedelta(days=1)).isoformat()
+        barrier = threading.Barrier(self.threadCount)
+
+        def attempt(i):
+            if i % 2:
+                form = RecurringSlotForm({'appointmentName': 'Checkup', 'startDate': slotDate, 'endDate': slotDate,
+                                          'daysOfWeek': [str(day) for day in range(7)], 'dayStart': '09:00', 'dayEnd': '11:00', 'slotLength': '60'})
+            else:
+                form = AppointmentSlotForm({'appointmentName': 'Checkup', 'date': slotDate, 'startTime': '09:30', 'endTime': '10:30'})
+            form.is_valid()
+            barrier.wait()
+            try:
+                form.save(provider)
+            except Exception:
+                # An overlap, or SQLite reporting lock contention instead of waiting
+                pass
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(i,)) for i in range(self.threadCount)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        slots = list(AppointmentSlot.objects.values_list('startTime', 'endTime'))
+        self.assertTrue(slots)
+        for i, (startTime, endTime) in enumerate(slots):
+            for otherStart, otherEnd in slots[i + 1:]:
+                self.assertFalse(startTime < otherEnd and endTime > otherStart, slots)
+
+
+class ConditionalApiTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.provider = createProvider('provider1')
+        self.user = createUser('user1')
+        self.slot = createSlot(self.provider, date.today() + timedelta(days=1), 9)
+        self.client.force_login(self.user)
+        self.url = reverse('apiAvailableSlots')
+
+    def testUnchangedResultsAnswer304ForETag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def testBookingInvalidatesETag(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            bookSlot(self.slot.id, self.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+    def testIfModifiedSince(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            createSlot(self.provider, date.today() + timedelta(days=2), 9)
+        response = self.client.get(self.url)
+        self.assertIn('Last-Modified', response)
+        later = http_date((timezone.now() + timedelta(minutes=5)).timestamp())
+        earlier = http_date((timezone.now() - timedelta(hours=1)).timestamp())
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=later).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=earlier).status_code, 200)
+
+
+class AccountSearchTests(FreshCacheMixin, TestCase):
+    # Account search matches prefixes, not substrings, so that it can use the name and username indexes
+    def setUp(self):
+        super().setUp()
+        createUser('annlee', firstName='Ann', lastName='Lee')
+        createProvider('sjones', firstName='Sam', lastName='Jones')
+
+    def matchingUsernames(self, search):
+        userProfiles, providerProfiles = filterUsers(UserProfile.objects.all(), ServiceProvider.objects.all(), search)
+        usernames = sorted(profile.user.username for profile in list(userProfiles) + list(providerProfiles))
+        counts = countAccounts(search)
+        self.assertEqual(counts['userCount'] + counts['providerCount'], len(usernames))
+        return usernames
+
+    def testMatchesPrefixesOfNamesAndUsernames(self):
+        self.assertEqual(self.matchingUsernames('ANN'), ['annlee'])
+        self.assertEqual(self.matchingUsernames('jon'), ['sjones'])
+        self.assertEqual(self.matchingUsernames('sjo'), ['sjones'])
+        self.assertEqual(self.matchingUsernames('Ann L'), ['annlee'])
+        self.assertEqual(self.matchingUsernames(''), ['annlee', 'sjones'])
+
+    def testNoLongerMatchesInsideNames(self):
+        # Substrings from the middle of a name matched before the search moved to prefixes
+        self.assertEqual(self.matchingUsernames('nle'), [])
+        self.assertEqual(self.matchingUsernames('ones'), [])
+        self.assertEqual(self.matchingUsernames('nn Lee'), [])
+
+
+class AdminBulkActionTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.slotDate = date.today() + timedelta(days=1)
+        self.providerCount = 0
+        self.client.force_login(User.objects.create_superuser('admin1', password='testpass123'))
+
+    def bookedSlots(self, count):
+        self.providerCount += 1
+        provider = createProvider(f'provider{self.providerCount}')
+        slots = [createSlot(provider, self.slotDate, 8 + i) for i in range(count)]
+        for i, slot in enumerate(slots):
+            bookSlot(slot.id, createUser(f'user{slot.id}'))
+        return slots
+
+    def testRemovingAccountsReleasesTheirSlots(self):
+        slots = self.bookedSlots(3)
+        usernames = [slot.booking.user.username for slot in slots[:2]]
+        response = self.client.post(reverse('adminDashboard') + '?view=users', {'username': usernames})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(User.objects.filter(username__in=usernames).exists())
+        released = AppointmentSlot.objects.filter(id__in=[slot.id for slot in slots[:2]])
+        self.assertEqual([(slot.isBooked, 'unbooked' in slot.searchText) for slot in released], [(False, True), (False, True)])
+        self.assertFalse(Booking.objects.filter(slot__in=released).exists())
+        self.assertTrue(AppointmentSlot.objects.get(id=slots[2].id).isBooked)
+
+    def testBulkCancelQueryCountIsConstant(self):
+        def cancelQueries(slots):
+            with CaptureQueriesContext(connection) as queries:
+                canceled = cancelSlots([slot.id for slot in slots])
+            self.assertEqual(canceled, len(slots))
+            return len(queries)
+
+        self.assertEqual(cancelQueries(self.bookedSlots(2)), cancelQueries(self.bookedSlots(6)))
+        self.assertFalse(AppointmentSlot.objects.exists())
+
+    def testBulkCancelFromDashboard(self):
+        slots = self.bookedSlots(3)
+        response = self.client.post(reverse('adminDashboard') + '?view=appointments', {'slotId': [slots[0].id, slots[1].id]})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(AppointmentSlot.objects.values_list('id', flat=True)), [slots[2].id])
+
+    def assertOneCacheInvalidation(self, bulkAction):
+        # The delete sends a signal per slot and booking, but the dashboard version moves once and the types clear once
+        versionBefore = getDashboardVersion()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            bulkAction()
+        self.assertEqual(getDashboardVersion(), versionBefore + 1)
+        queued = [getattr(callback, 'func', callback) for callback in callbacks]
+        self.assertEqual(queued.count(bumpDashboardVersion), 1)
+        self.assertLessEqual(queued.count(clearAppointmentTypes), 1)
+
+    def testBulkCancelBumpsDashboardVersionOnce(self):
+        slots = self.bookedSlots(5)
+        self.assertOneCacheInvalidation(lambda: cancelSlots([slot.id for slot in slots]))
+
+    def testRemovingAccountsBumpsDashboardVersionOnce(self):
+        slots = self.bookedSlots(5)
+        self.assertOneCacheInvalidation(lambda: deleteAccounts([slot.booking.user.username for slot in slots]))
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_QUERY_THRESHOLD=3)
+class ProfilingMiddlewareTests(FreshCacheMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def profiledRequest(self, view):
+        # Run one request through the middleware as the view named 'profiled'
+        request = RequestFactory().get('/profiled/')
+        request.resolver_match = SimpleNamespace(view_name='profiled')
+        return ProfilingMiddleware(lambda request: view())(request)
+
+    def runQueries(self, count):
+        for _ in range(count):
+            User.objects.exists()
+
+    def viewStats(self):
+        return next((stats for stats in metrics.snapshot() if stats['view'] == 'profiled'), None)
+
+    def testFlagsRequestsAtTheQueryThreshold(self):
+        with self.assertLogs('website.profiling', 'INFO') as logs:
+            self.profiledRequest(lambda: self.runQueries(2) or HttpResponse())
+            self.profiledRequest(lambda: self.runQueries(3) or HttpResponse())
+        entries = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertEqual([(entry['queries'], entry['flagged']) for entry in entries], [(2, False), (3, True)])
+        self.assertEqual([record.levelname for record in logs.records], ['INFO', 'WARNING'])
+        self.assertEqual((self.viewStats()['requests'], self.viewStats()['flagged']), (2, 1))
+
+    def testStreamingResponseCountsQueriesWhileStreaming(self):
+        def rows():
+            for i in range(4):
+                self.runQueries(1)
+                yield f"{i}\n"
+
+        response = self.profiledRequest(lambda: StreamingHttpResponse(rows()))
+        # Nothing is recorded until the body has been sent
+        self.assertIsNone(self.viewStats())
+        with self.assertLogs('website.profiling', 'WARNING') as logs:
+            self.assertEqual(b''.join(response.streaming_content), b"0\n1\n2\n3\n")
+        self.assertEqual(json.loads(logs.records[0].getMessage())['queries'], 4)
+        self.assertEqual((self.viewStats()['maxQueries'], self.viewStats()['flagged']), (4, 1))
+
+
+class SessionStoreTests(FreshCacheMixin, TestCase):
+    # Each SESSION_STORE option names a working engine; they differ in how often a request reads django_session
+    def setUp(self):
+        super().setUp()
+        self.user = createUser('user1')
+
+    def sessionQueriesPerRequest(self, store):
+        with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[store]):
+            # A new client gets a new handler, so SessionMiddleware picks up the overridden engine
+            client = Client()
+            client.force_login(self.user)
+            self.assertEqual(client.get(reverse('userDashboard')).status_code, 200)
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(reverse('userDashboard'))
+            self.assertEqual(response.context['user'], self.user)
+        return sum(1 for q in queries if 'django_session' in q['sql'])
+
+    def testSelectedStoreSetsEngine(self):
+        self.assertEqual(settings.SESSION_ENGINE, settings.SESSION_ENGINES[settings.SESSION_STORE])
+
+    def testDatabaseStoreReadsEveryRequest(self):
+        self.assertEqual(self.sessionQueriesPerRequest('db'), 1)
+
+    def testCachedStoreReadsFromCache(self):
+        self.assertEqual(self.sessionQueriesPerRequest('cached_db'), 0)
+
+    def testSignedCookieStoreNeedsNoTable(self):
+        self.assertEqual(self.sessionQueriesPerRequest('signed_cookies'), 0)
+
+
+class SeedDataTests(FreshCacheMixin, TestCase):
+    def testSeedsRequestedDataset(self):
+        call_command('seedData', providers=2, users=3, days=2, slots_per_day=4, booking_ratio=0.5, stdout=StringIO())
+
+        self.assertEqual(ServiceProvider.objects.count(), 2)
+        self.assertEqual(UserProfile.objects.count(), 3)
+        self.assertEqual(AppointmentSlot.objects.count(), 2 * 2 * 4)
+        # Every booked slot has exactly one booking and its search text names the booked user
+        self.assertEqual(AppointmentSlot.objects.filter(isBooked=True).count(), Booking.objects.count())
+        for booking in Booking.objects.select_related('slot', 'user'):
+            self.assertIn(booking.user.get_full_name().lower(), booking.slot.searchText)
+        self.assertFalse(AppointmentSlot.objects.filter(provider__isnull=True).exists())
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(FreshCacheMixin, TestCase):
+    def createPool(self, **kwargs):
+        def check(conn):
+            if not conn.healthy:
+                raise DatabaseError("connection lost")
+        return ConnectionPool(check, **kwargs)
+
+    def testReusesReleasedConnectionsUpToMaxSize(self):
+        pool = self.createPool(maxSize=2, acquireTimeout=0)
+        first = pool.acquire(FakeConnection)
+        second = pool.acquire(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(FakeConnection)
+
+        pool.release(first)
+        self.assertIs(pool.acquire(FakeConnection), first)
+        self.assertEqual(pool.stats()['opened'], 2)
+
+    def testReplacesUnhealthyAndEvictsIdleConnections(self):
+        pool = self.createPool(minSize=1, maxSize=3, idleTimeout=-1)
+        conns = [pool.acquire(FakeConnection) for _ in range(3)]
+        conns[2].healthy = False
+        for conn in conns:
+            pool.release(conn)
+
+        # Idle connections past the timeout are closed down to MIN_SIZE, oldest first
+        self.assertEqual(pool.stats()['size'], 1)
+        self.assertTrue(conns[0].closed and conns[1].closed)
+        # The one left is unhealthy, so acquiring opens a replacement
+        replacement = pool.acquire(FakeConnection)
+        self.assertIsNot(replacement, conns[2])
+        self.assertTrue(conns[2].closed)
+        self.assertEqual(pool.stats(), {'size': 1, 'idle': 0, 'inUse': 1, 'opened': 4})
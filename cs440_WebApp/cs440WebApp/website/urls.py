@@ -1,6 +1,7 @@
 from django.urls import path
 from website import views
 from . import views
+from . import api
 
 urlpatterns = [
     path('', views.home, name = 'home'),
@@ -8,6 +9,7 @@ urlpatterns = [
     path('register/user/', views.registerUser, name = 'registerUser'),
     path('register/provider/', views.registerProvider, name = 'registerProvider'),
     path('dashboard/user/', views.userDashboard, name='userDashboard'),
+    path('dashboard/user/calendar/', views.availabilityCalendar, name='availabilityCalendar'),
     path('dashboard/provider/', views.providerDashboard, name='providerDashboard'),
     path('dashboard/admin/', views.adminDashboard, name='adminDashboard'),
     path('book/<int:slotId>/', views.bookAppointment, name='bookAppointment'),
@@ -17,4 +19,12 @@ urlpatterns = [
     path('dashboard/admin/downloadAllUsersReport/', views.downloadAllUsersReport, name='downloadAllUsersReport'),
     path('dashboard/admin/downloadProviderReport/', views.downloadProviderReport, name='downloadProviderReport'),
     path('dashboard/admin/downloadAllProvidersReport/', views.downloadAllProvidersReport, name='downloadAllProvidersReport'),
+    path('dashboard/admin/reports/queue/', views.queueReport, name='queueReport'),
+    path('dashboard/admin/reports/status/', views.reportJobStatus, name='reportJobStatus'),
+    path('dashboard/admin/reports/<int:jobId>/download/', views.downloadReportJob, name='downloadReportJob'),
+    path('api/slots/', api.availableSlots, name='apiAvailableSlots'),
+    path('api/bookings/', api.myBookings, name='apiMyBookings'),
+    path('api/availability/', api.availability, name='apiAvailability'),
+    path('api/admin/appointments/', api.adminAppointments, name='apiAdminAppointments'),
+    path('api/admin/metrics/', api.requestMetrics, name='apiRequestMetrics'),
 ]
\ No newline at end of file
@@ -1,55 +1,58 @@
 import csv
-from django.db import connection
+from datetime import date, datetime, timedelta
+from django.db import transaction
+from django.db.models import Count, Q
 from .models import UserProfile, ServiceProvider, Booking, AppointmentSlot, User
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 
 # File containing helper functions in filtering table views
 def convertFromMilitaryTime(timeStamp):
     return timeStamp.strftime('%I:%M %p').lstrip('0').replace(' 0', ' ')
 
-def filterNonPastAppointments(queryset):
-    nonPastAppointments = []
-    for item in queryset:
-        if not item.isPast():
-            nonPastAppointments.append(item)
-    return nonPastAppointments
-
-def filterNonPastBookings(bookings):
-    nonPastBookings = []
-    for booking in bookings:
-        if not booking.slot.isPast():
-            nonPastBookings.append(booking)
-    return nonPastBookings
-
-def filterAppointments(appointmentSlots, search='', typeFilter='', dateFilter=''):
-    filtered = []
-    
-    # Grab string from search box and convert to lowercase for case-insensitive comparison
-    search = search.strip().lower()
-    
+# Pages of slots/bookings are ordered by (date, startTime, id) and walked with keyset cursors
+SLOT_KEYSET_FIELDS = ('date', 'startTime', 'id')
+BOOKING_KEYSET_FIELDS = ('slot__date', 'slot__startTime', 'id')
+PROFILE_KEYSET_FIELDS = ('id',)
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+def filterAppointmentSlots(appointmentSlots, search='', typeFilter='', dateFilter=''):
+    # Grab string from search box and trim it
+    search = search.strip()
+
+    # Join the booked user in the same query instead of loading it per row
+    # and compute past/non-past in SQL instead of calling isPast() per row
+    appointmentSlots = appointmentSlots.select_related('booking__user').withIsPast()
+
+    # Partial search for appointment name, user, or provider through the slot's lowercased searchText column.
+    # One column replaces the ORs across the slot and user tables, but LIKE '%term%' still reads every slot.
+    if search:
+        appointmentSlots = appointmentSlots.filter(searchText__contains=search.lower())
+
+    if typeFilter:
+        appointmentSlots = appointmentSlots.filter(appointmentType=typeFilter)
+
+    if dateFilter:
+        try:
+            filterDate = datetime.strptime(dateFilter, '%Y-%m-%d').date()
+        except ValueError:
+            # A malformed date can never match a slot
+            return appointmentSlots.none()
+        appointmentSlots = appointmentSlots.filter(date=filterDate)
+
+    return appointmentSlots
+
+def formatAppointments(appointmentSlots):
+    formatted = []
     for slot in appointmentSlots:
         # Display date as M:D:Y
         formattedDate = slot.date.strftime('%m-%d-%Y')
         booking = getattr(slot, 'booking', None)
         user_name = booking.user.get_full_name() if booking else "Unbooked"
         providerName = f"{slot.providerFirstName} {slot.providerLastName}"
-        
-        # Partial, case-insensitive search for appointment name, user, or provider
-        if search:
-            # Check if string entered is in appointment name, user name, or provider name
-            combined = f"{slot.appointmentName} {user_name} {providerName}".lower()
-            
-            if search not in combined:
-                continue
-
-        if typeFilter and slot.appointmentType != typeFilter:
-            continue
 
-        if dateFilter and slot.date.strftime('%Y-%m-%d') != dateFilter:
-            continue
-        
-        # Add relevant appointment details to the filtered list, including slotId
-        filtered.append({
+        # Add relevant appointment details to the list, including slotId
+        formatted.append({
             'slotId': slot.id,
             'userName': user_name,
             'providerName': providerName,
@@ -59,80 +62,284 @@ def filterAppointments(appointmentSlots, search='', typeFilter='', dateFilter=''
             'time': f"{convertFromMilitaryTime(slot.startTime)} - {convertFromMilitaryTime(slot.endTime)}",
             'startTime': slot.startTime,
             'endTime': slot.endTime,
-            'isPast': slot.isPast(),
+            'isPast': slot.isPastSlot,
         })
-        # Sort so non-past appointments come first
-    filtered.sort(key=lambda x: x['isPast'])
-    # Return the filtered list of appointments
-    return filtered
+    return formatted
+
+def getPageSize(request):
+    # Page size comes from the pageSize GET param, clamped so a request can't ask for the whole table
+    try:
+        pageSize = int(request.GET.get('pageSize', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        pageSize = DEFAULT_PAGE_SIZE
+    return max(1, min(pageSize, MAX_PAGE_SIZE))
+
+def encodeCursor(values):
+    if len(values) == 1:
+        # id-only cursor
+        return str(values[0])
+    dateValue, timeValue, pk = values
+    return f"{dateValue.strftime('%Y-%m-%d')}_{timeValue.strftime('%H:%M:%S')}_{pk}"
+
+def decodeCursor(cursor):
+    # Returns (date, startTime, id), (id,) for id-only cursors, or None if the cursor is missing or malformed
+    try:
+        if '_' not in cursor:
+            return (int(cursor),)
+        dateText, timeText, pk = cursor.split('_')
+        return (datetime.strptime(dateText, '%Y-%m-%d').date(), datetime.strptime(timeText, '%H:%M:%S').time(), int(pk))
+    except ValueError:
+        return None
+
+def keysetQ(fields, values, op, inclusive=False):
+    # Lexicographic tuple comparison, e.g. (date, startTime, id) > (d, t, i), as an OR of prefix matches
+    condition = Q()
+    for i, field in enumerate(fields):
+        lookup = {fields[j]: values[j] for j in range(i)}
+        lastOp = f"{op}e" if inclusive and i == len(fields) - 1 else op
+        lookup[f"{field}__{lastOp}"] = values[i]
+        condition |= Q(**lookup)
+    return condition
+
+def keysetValues(row, fields):
+    # Read (date, startTime, id) off a row, following "slot__date" style paths
+    if isinstance(row, dict):
+        # values() rows already use the lookup paths as keys
+        return tuple(row[field] for field in fields)
+    values = []
+    for field in fields:
+        value = row
+        for part in field.split('__'):
+            value = getattr(value, part)
+        values.append(value)
+    return tuple(values)
+
+def paginateByKeyset(queryset, after='', before='', pageSize=DEFAULT_PAGE_SIZE, fields=SLOT_KEYSET_FIELDS, startAt=None):
+    # Returns one page of rows plus cursors for the neighbouring pages.
+    # 'after'/'before' are cursors from a previous page; 'startAt' is a row to open on when neither is given.
+    ascending = queryset.order_by(*fields)
+    descending = queryset.order_by(*[f"-{field}" for field in fields])
+    afterValues = decodeCursor(after) if after else None
+    beforeValues = decodeCursor(before) if before else None
+    # Ignore cursors taken from a list keyed on different fields
+    if afterValues and len(afterValues) != len(fields):
+        afterValues = None
+    if beforeValues and len(beforeValues) != len(fields):
+        beforeValues = None
 
+    if beforeValues:
+        rows = list(descending.filter(keysetQ(fields, beforeValues, 'lt'))[:pageSize + 1])
+        hasPrev = len(rows) > pageSize
+        rows = rows[:pageSize][::-1]
+        hasNext = True
+    elif afterValues:
+        rows = list(ascending.filter(keysetQ(fields, afterValues, 'gt'))[:pageSize + 1])
+        hasNext = len(rows) > pageSize
+        rows = rows[:pageSize]
+        hasPrev = True
+    elif startAt is not None:
+        startValues = keysetValues(startAt, fields)
+        rows = list(ascending.filter(keysetQ(fields, startValues, 'gt', inclusive=True))[:pageSize + 1])
+        hasNext = len(rows) > pageSize
+        rows = rows[:pageSize]
+        hasPrev = queryset.filter(keysetQ(fields, startValues, 'lt')).exists()
+    else:
+        rows = list(ascending[:pageSize + 1])
+        hasNext = len(rows) > pageSize
+        rows = rows[:pageSize]
+        hasPrev = False
+
+    return {
+        'rows': rows,
+        'nextCursor': encodeCursor(keysetValues(rows[-1], fields)) if rows and hasNext else '',
+        'prevCursor': encodeCursor(keysetValues(rows[0], fields)) if rows and hasPrev else '',
+    }
+
+def addPageUrls(request, page, afterParam='after', beforeParam='before'):
+    # Build next/prev links that keep the current search/type/date/pageSize GET params
+    for key, param, otherParam in (('nextUrl', afterParam, beforeParam), ('prevUrl', beforeParam, afterParam)):
+        cursor = page['nextCursor'] if key == 'nextUrl' else page['prevCursor']
+        if not cursor:
+            page[key] = ''
+            continue
+        params = request.GET.copy()
+        params[param] = cursor
+        params.pop(otherParam, None)
+        page[key] = f"?{params.urlencode()}"
+    return page
+
+
+# Availability calendar: a month or week grid of per-day, per-type open/booked counts for upcoming slots
+CALENDAR_VIEWS = ('month', 'week')
+
+def calendarRange(view, anchor):
+    # First and last day shown: the Monday-to-Sunday week holding anchor, or the whole weeks covering its month
+    if view == 'week':
+        first = anchor - timedelta(days=anchor.weekday())
+        return first, first + timedelta(days=6)
+    monthStart = anchor.replace(day=1)
+    monthEnd = (monthStart + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return monthStart - timedelta(days=monthStart.weekday()), monthEnd + timedelta(days=6 - monthEnd.weekday())
+
+def parseDate(text):
+    # YYYY-MM-DD from a query parameter, or None if it isn't one
+    try:
+        return datetime.strptime(text, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+def getCalendarParams(request):
+    # ?view=month|week&start=YYYY-MM-DD&typeFilter=..., falling back to this month for anything invalid
+    view = request.GET.get('view', 'month')
+    if view not in CALENDAR_VIEWS:
+        view = 'month'
+    anchor = parseDate(request.GET.get('start', '')) or date.today()
+    if view == 'month':
+        anchor = anchor.replace(day=1)
+        previous = (anchor - timedelta(days=1)).replace(day=1)
+        following = (anchor + timedelta(days=32)).replace(day=1)
+    else:
+        anchor = anchor - timedelta(days=anchor.weekday())
+        previous = anchor - timedelta(days=7)
+        following = anchor + timedelta(days=7)
+    firstDate, lastDate = calendarRange(view, anchor)
+    return {
+        'view': view,
+        'start': anchor,
+        'previous': previous,
+        'next': following,
+        'firstDate': firstDate,
+        'lastDate': lastDate,
+        'typeFilter': request.GET.get('typeFilter', ''),
+    }
+
+def availabilityCounts(firstDate, lastDate, typeFilter=''):
+    # Only upcoming slots count, so days that are over show nothing
+    slots = AppointmentSlot.objects.upcoming().filter(date__gte=firstDate, date__lte=lastDate)
+    if typeFilter:
+        slots = slots.filter(appointmentType=typeFilter)
+    return list(slots.availabilityByDay())
+
+def buildCalendar(firstDate, lastDate, counts, month=None):
+    # Weeks of day cells, each with its per-type counts and totals
+    countsByDate = {}
+    for row in counts:
+        countsByDate.setdefault(row['date'], []).append(row)
+    today = date.today()
+    weeks = []
+    day = firstDate
+    while day <= lastDate:
+        week = []
+        for _ in range(7):
+            types = countsByDate.get(day, [])
+            week.append({
+                'date': day,
+                'types': types,
+                'openCount': sum(row['openCount'] for row in types),
+                'bookedCount': sum(row['bookedCount'] for row in types),
+                'inMonth': month is None or day.month == month,
+                'isPast': day < today,
+            })
+            day += timedelta(days=1)
+        weeks.append(week)
+    return weeks
+
+
+def accountSearchQ(search, profilePath='', userPath='user__'):
+    # Prefix matches on username, first name, last name or "first last" so the lookups can use the indexes
+    # (MySQL's case-insensitive collation turns istartswith into an index range scan)
+    condition = (Q(**{f'{userPath}username__istartswith': search}) |
+                 Q(**{f'{profilePath}firstName__istartswith': search}) |
+                 Q(**{f'{profilePath}lastName__istartswith': search}))
+    firstName, _, lastName = search.partition(' ')
+    if lastName.strip():
+        condition |= Q(**{f'{profilePath}firstName__iexact': firstName, f'{profilePath}lastName__istartswith': lastName.strip()})
+    return condition
 
 def filterUsers(userProfiles, providerProfiles, search='', typeFilter=''):
-    search = search.strip().lower()
+    search = search.strip()
 
     # Filter by type
     if typeFilter == "User":
-        providerProfiles = []
+        providerProfiles = providerProfiles.none()
     elif typeFilter == "Provider":
-        userProfiles = []
+        userProfiles = userProfiles.none()
 
     # Filter by search
-    def matches(profile):
-        username = profile.user.username.lower()
-        fullName = f"{getattr(profile, 'firstName', '')} {getattr(profile, 'lastName', '')}".strip().lower()
-        return search in username or search in fullName
-
-    # Generate filtered lists of users/providers matching the search criteria
-    filteredUserProfiles = []
-    for p in userProfiles:
-        if matches(p):
-            filteredUserProfiles.append(p)
+    if search:
+        userProfiles = userProfiles.filter(accountSearchQ(search))
+        providerProfiles = providerProfiles.filter(accountSearchQ(search))
 
-    filteredProviderProfiles = []
-    for p in providerProfiles:
-        if matches(p):
-            filteredProviderProfiles.append(p)
+    return userProfiles.select_related('user'), providerProfiles.select_related('user')
 
-    return filteredUserProfiles, filteredProviderProfiles
+def countAccounts(search='', typeFilter=''):
+    # Matching user and provider counts from one aggregate query over auth_user
+    userMatch = Q(userprofile__isnull=False)
+    providerMatch = Q(serviceprovider__isnull=False)
+    search = search.strip()
+    if search:
+        userMatch &= accountSearchQ(search, 'userprofile__', '')
+        providerMatch &= accountSearchQ(search, 'serviceprovider__', '')
+    counts = User.objects.aggregate(userCount=Count('id', filter=userMatch), providerCount=Count('id', filter=providerMatch))
+    if typeFilter == "User":
+        counts['providerCount'] = 0
+    elif typeFilter == "Provider":
+        counts['userCount'] = 0
+    return counts
 
 
 def filterBookings(bookings, search='', typeFilter=''):
-    search = search.strip().lower()
-    filtered = []
-    for booking in bookings:
-        slot = booking.slot
-        provider_name = f"{slot.providerFirstName} {slot.providerLastName}"
-        if search:
-            combined = f"{slot.appointmentName} {slot.providerUsername} {provider_name}".lower()
-            if search not in combined:
-                continue
-        if typeFilter and slot.appointmentType != typeFilter:
-            continue
-        filtered.append(booking)
-    return filtered
+    search = search.strip()
+    bookings = bookings.select_related('slot')
+    if search:
+        bookings = bookings.filter(slot__searchText__contains=search.lower())
+    if typeFilter:
+        bookings = bookings.filter(slot__appointmentType=typeFilter)
+    return bookings
+
+# Based on usernames, delete users and everything that references them in one transaction.
+# Slots the users had booked are freed first; the rest goes through set-based cascading deletes.
+# Returns the number of accounts deleted.
+def deleteAccounts(usernames):
+    with transaction.atomic():
+        userIds = list(User.objects.filter(username__in=usernames).values_list('id', flat=True))
+        if not userIds:
+            return 0
+        AppointmentSlot.objects.filter(booking__user_id__in=userIds).markUnbooked()
+        # Cascades to bookings, profiles, notifications and report jobs
+        User.objects.filter(id__in=userIds).delete()
+        return len(userIds)
 
-# Based on username, delete user and associated profile/provider entries from the database
 def deleteUserAndProfile(username):
-    # Get user id from auth_user
-    with connection.cursor() as cursor:
-        cursor.execute("SELECT id FROM auth_user WHERE username = %s", [username])
-        row = cursor.fetchone()
-        if not row:
-            return False  # User not found
-        userId = row[0]
-
-    # Delete related bookings first
-    Booking.objects.filter(user_id=userId).delete()
-    # Delete from UserProfile if exists
-    UserProfile.objects.filter(user_id=userId).delete()
-    # Delete from ServiceProvider if exists
-    ServiceProvider.objects.filter(user_id=userId).delete()
-    # Delete from auth_user using raw SQL to avoid Django's cascades
-    with connection.cursor() as cursor:
-        cursor.execute("DELETE FROM auth_user WHERE username = %s", [username])
-    return True
+    return deleteAccounts([username]) > 0
 
-def generateUserAppointmentsCsv(username, startDate, endDate, appointmentType=None):
+# Reports are streamed: rows are read from the database in chunks and written out as they are produced
+CSV_CHUNK_SIZE = 2000
+
+class Echo:
+    # File-like object for csv.writer that hands each line back instead of buffering it
+    def write(self, value):
+        return value
+
+def streamCsvResponse(filename, header, rows):
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(lines(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def formatBookedAt(booking):
+    if booking and booking.bookedAt:
+        return f"{booking.bookedAt.strftime('%m-%d-%Y')} {convertFromMilitaryTime(booking.bookedAt)}"
+    return ''
+
+# Each *Report function returns (filename, header, rows) so the same rows can be streamed or written to disk
+def userAppointmentsReport(username, startDate, endDate, appointmentType=None):
     user = User.objects.filter(username=username).first()
     if not user:
         return None
@@ -143,125 +350,119 @@ def generateUserAppointmentsCsv(username, startDate, endDate, appointmentType=No
     )
     if appointmentType:
         bookings = bookings.filter(slot__appointmentType=appointmentType)
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{username}_appointment_report.csv"'
-    writer = csv.writer(response)
-    writer.writerow([
+
+    def rows():
+        for booking in bookings.select_related('slot').iterator(chunk_size=CSV_CHUNK_SIZE):
+            slot = booking.slot
+            yield [
+                slot.appointmentName,
+                slot.appointmentType,
+                f"{slot.providerFirstName} {slot.providerLastName}",
+                slot.date,
+                slot.startTime,
+                slot.endTime,
+                formatBookedAt(booking)
+            ]
+
+    return f"{username}_appointment_report.csv", [
         'Appointment Name', 'Appointment Type', 'Provider', 'Date', 'Start Time', 'End Time', 'Booked At'
-    ])
-    for booking in bookings.select_related('slot'):
-        slot = booking.slot
-        if booking.bookedAt:
-            bookedAtDate = booking.bookedAt.strftime('%m-%d-%Y')
-            bookedAtTime = convertFromMilitaryTime(booking.bookedAt)
-            formattedBookedAt = f"{bookedAtDate} {bookedAtTime}"
-        else:
-            formattedBookedAt = ''
-        writer.writerow([
-            slot.appointmentName,
-            slot.appointmentType,
-            f"{slot.providerFirstName} {slot.providerLastName}",
-            slot.date,
-            slot.startTime,
-            slot.endTime,
-            formattedBookedAt
-        ])
-    return response
+    ], rows()
 
-def generateAllUsersReport(startDate, endDate, appointmentType=None):
+def allUsersReport(startDate, endDate, appointmentType=None):
     bookings = Booking.objects.filter(
         slot__date__gte=startDate,
         slot__date__lte=endDate
     )
     if appointmentType:
         bookings = bookings.filter(slot__appointmentType=appointmentType)
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="All_Appointments_Report.csv"'
-    writer = csv.writer(response)
-    writer.writerow([
+
+    def rows():
+        for booking in bookings.select_related('slot', 'user').iterator(chunk_size=CSV_CHUNK_SIZE):
+            slot = booking.slot
+            user = booking.user
+            yield [
+                user.username,
+                f"{user.first_name} {user.last_name}",
+                slot.appointmentName,
+                slot.appointmentType,
+                f"{slot.providerFirstName} {slot.providerLastName}",
+                slot.date,
+                slot.startTime,
+                slot.endTime,
+                formatBookedAt(booking)
+            ]
+
+    return "All_Appointments_Report.csv", [
         'Username', 'Full Name', 'Appointment Name', 'Appointment Type', 'Provider', 'Date', 'Start Time', 'End Time', 'Booked At'
-    ])
-    for booking in bookings.select_related('slot', 'user'):
-        slot = booking.slot
-        user = booking.user
-        if booking.bookedAt:
-            bookedAtDate = booking.bookedAt.strftime('%m-%d-%Y')
-            bookedAtTime = convertFromMilitaryTime(booking.bookedAt)
-            formattedBookedAt = f"{bookedAtDate} {bookedAtTime}"
-        else:
-            formattedBookedAt = ''
-        writer.writerow([
-            user.username,
-            f"{user.first_name} {user.last_name}",
-            slot.appointmentName,
-            slot.appointmentType,
-            f"{slot.providerFirstName} {slot.providerLastName}",
-            slot.date,
-            slot.startTime,
-            slot.endTime,
-            formattedBookedAt
-        ])
-    return response
+    ], rows()
 
-def generateProviderAppointmentsCsv(username, startDate, endDate):
+def providerAppointmentsReport(username, startDate, endDate):
     provider = ServiceProvider.objects.filter(user__username=username).first()
     if not provider:
         return None
     slots = AppointmentSlot.objects.filter(
-        providerUsername=username,
+        provider=provider,
         date__gte=startDate,
         date__lte=endDate
-    ).select_related('booking')
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{username}_provider_appointment_report.csv"'
-    writer = csv.writer(response)
-    writer.writerow([
+    ).select_related('booking__user')
+
+    def rows():
+        for slot in slots.iterator(chunk_size=CSV_CHUNK_SIZE):
+            booking = getattr(slot, 'booking', None)
+            yield [
+                slot.appointmentName,
+                slot.date.strftime('%m-%d-%Y'),
+                booking.user.get_full_name() if booking else '',
+                convertFromMilitaryTime(slot.startTime),
+                convertFromMilitaryTime(slot.endTime),
+                formatBookedAt(booking),
+                'Yes' if booking else 'No'
+            ]
+
+    return f"{username}_provider_appointment_report.csv", [
         'Appointment Name', 'Date', 'User Booked', 'Start Time', 'End Time', 'Booked At', 'Booked'
-    ])
-    for slot in slots:
-        booking = Booking.objects.filter(slot=slot).first()
-        userBooked = booking.user.get_full_name() if booking else ''
-        bookedAt = (f"{booking.bookedAt.strftime('%m-%d-%Y')} {convertFromMilitaryTime(booking.bookedAt)}"
-                    if booking and booking.bookedAt else '')
-        bookedFlag = 'Yes' if booking else 'No'
-        writer.writerow([
-            slot.appointmentName,
-            slot.date.strftime('%m-%d-%Y'),
-            userBooked,
-            convertFromMilitaryTime(slot.startTime),
-            convertFromMilitaryTime(slot.endTime),
-            bookedAt,
-            bookedFlag
-        ])
-    return response
+    ], rows()
 
-def generateAllProvidersReport(startDate, endDate, appointmentType=None):
+def allProvidersReport(startDate, endDate, appointmentType=None):
     slots = AppointmentSlot.objects.filter(
         date__gte=startDate,
         date__lte=endDate
     )
     if appointmentType:
         slots = slots.filter(appointmentType=appointmentType)
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="All_Providers_Appointments_Report.csv"'
-    writer = csv.writer(response)
-    writer.writerow([
+    # Join each slot's booking, booked user and provider so the export is a single query
+    slots = slots.select_related('booking__user', 'provider__user')
+
+    def rows():
+        for slot in slots.iterator(chunk_size=CSV_CHUNK_SIZE):
+            booking = getattr(slot, 'booking', None)
+            provider = slot.provider
+            yield [
+                provider.user.username if provider else slot.providerUsername,
+                f"{provider.firstName} {provider.lastName}" if provider else f"{slot.providerFirstName} {slot.providerLastName}",
+                slot.appointmentName,
+                slot.appointmentType,
+                slot.date,
+                slot.startTime,
+                slot.endTime,
+                'Yes' if booking else 'No',
+                booking.user.get_full_name() if booking else ''
+            ]
+
+    return "All_Providers_Appointments_Report.csv", [
         'Provider Username', 'Provider Name', 'Appointment Name', 'Appointment Type', 'Date', 'Start Time', 'End Time', 'Booked', 'Booked By'
-    ])
-    for slot in slots:
-        booking = Booking.objects.filter(slot=slot).first()
-        bookedFlag = 'Yes' if booking else 'No'
-        bookedBy = booking.user.get_full_name() if booking else ''
-        writer.writerow([
-            slot.providerUsername,
-            f"{slot.providerFirstName} {slot.providerLastName}",
-            slot.appointmentName,
-            slot.appointmentType,
-            slot.date,
-            slot.startTime,
-            slot.endTime,
-            bookedFlag,
-            bookedBy
-        ])
-    return response
+    ], rows()
+
+def generateUserAppointmentsCsv(username, startDate, endDate, appointmentType=None):
+    report = userAppointmentsReport(username, startDate, endDate, appointmentType)
+    return streamCsvResponse(*report) if report else None
+
+def generateAllUsersReport(startDate, endDate, appointmentType=None):
+    return streamCsvResponse(*allUsersReport(startDate, endDate, appointmentType))
+
+def generateProviderAppointmentsCsv(username, startDate, endDate):
+    report = providerAppointmentsReport(username, startDate, endDate)
+    return streamCsvResponse(*report) if report else None
 
+def generateAllProvidersReport(startDate, endDate, appointmentType=None):
+    return streamCsvResponse(*allProvidersReport(startDate, endDate, appointmentType))
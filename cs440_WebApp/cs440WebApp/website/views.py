@@ -4,10 +4,16 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.cache import never_cache
+from django.http import FileResponse, Http404, JsonResponse
+from django.urls import reverse
 # Import forms models, and helper utilities
 from .forms import *
 from .models import *
 from .utils import *
+from .booking import BookingError, bookSlot, cancelSlots
+from .analytics import adminAnalytics
+from .caching import cachedAnalytics, cachedFragment, getAppointmentTypes
+from .roles import requestRole
 
 
 # Helper function to reduce duplicate authentication code
@@ -16,7 +22,8 @@ def checkAuthenticationAndRole(request, roleCheck, errorMessage):
     if not request.user.is_authenticated:
         messages.error(request, "Please log in to access this page.")
         return redirect('home')
-    if not roleCheck(request.user):
+    # Roles come from the session copy on request.role rather than a profile query per check
+    if not roleCheck(requestRole(request)):
         messages.error(request, errorMessage)
         return redirect('home')
     return None
@@ -28,7 +35,7 @@ def userRequired(viewFunction):
     def wrapper(request, *args, **kwargs):
         redirect_response = checkAuthenticationAndRole(
             request, 
-            lambda user: hasattr(user, 'userprofile'),
+            lambda role: role.isUser,
             "Access denied: This page is for registered users only."
         )
         return redirect_response or viewFunction(request, *args, **kwargs)
@@ -40,7 +47,7 @@ def providerRequired(viewFunction):
     def wrapper(request, *args, **kwargs):
         redirect_response = checkAuthenticationAndRole(
             request,
-            lambda user: hasattr(user, 'serviceprovider'),
+            lambda role: role.isProvider,
             "Access denied: This page is for service providers only."
         )
         return redirect_response or viewFunction(request, *args, **kwargs)
@@ -52,7 +59,7 @@ def adminRequired(view_func):
     def wrapper(request, *args, **kwargs):
         redirect_response = checkAuthenticationAndRole(
             request,
-            lambda user: user.is_superuser or user.is_staff or hasattr(user, 'adminprofile'),
+            lambda role: role.isAdmin,
             "Access denied: This page is for administrators only."
         )
         return redirect_response or view_func(request, *args, **kwargs)
@@ -71,11 +78,12 @@ def helpView(request):
 def home(request):
     # If user is already authenticated, redirect to appropriate dashboard
     if request.user.is_authenticated:
+        role = requestRole(request)
         if request.user.is_superuser or request.user.is_staff:
             return redirect('adminDashboard')
-        elif hasattr(request.user, 'serviceprovider'):
+        elif role.isProvider:
             return redirect('providerDashboard')
-        elif hasattr(request.user, 'userprofile'):
+        elif role.isUser:
             return redirect('userDashboard')
         else:
             # User is authenticated but has no profile - force logout
@@ -94,13 +102,15 @@ def home(request):
         user = authenticate(request, username=username, password=password)
         if user is not None:
             if user.is_active:
+                # login() resolves the roles and keeps them in the session (see signals.py)
                 login(request, user)
+                role = requestRole(request)
                 # Check for Django admin first
                 if user.is_superuser or user.is_staff:
                     return redirect('adminDashboard')
-                elif hasattr(user, 'serviceprovider'):
+                elif role.isProvider:
                     return redirect('providerDashboard')
-                elif hasattr(user, 'userprofile'):
+                elif role.isUser:
                     return redirect('userDashboard')
                 else:
                     # User exists but has no profile
@@ -163,43 +173,58 @@ def registerProvider(request):
 @never_cache
 @providerRequired
 def providerDashboard(request):
-    try:
-        # Get provider profile from database via model
-        providerProfile = ServiceProvider.objects.get(user=request.user)
-    except ServiceProvider.DoesNotExist:
+    # Provider profile from the session copy resolved at login
+    providerProfile = requestRole(request).providerProfile
+    if providerProfile is None:
         messages.error(request, "Access denied: You are not registered as a provider.")
         return redirect('home')
 
     # Get and clear canceled messages for provider
     canceledMsgs = providerProfile.getAndClearCanceledMsgs()
 
-    # Handle new slot form submission
+    # Handle new slot or recurring schedule form submission
+    slotForm = AppointmentSlotForm()
+    recurringForm = RecurringSlotForm()
     if request.method == "POST":
-        slotForm = AppointmentSlotForm(request.POST)
-        if slotForm.is_valid():
-            slotForm.save(providerProfile)
-            messages.success(request, "Appointment slot added successfully.")
-            return redirect('providerDashboard')
-    else:
-        slotForm = AppointmentSlotForm()
+        if request.POST.get('formType') == 'recurring':
+            recurringForm = RecurringSlotForm(request.POST)
+            if recurringForm.is_valid():
+                created, skipped = recurringForm.save(providerProfile)
+                messages.success(request, f"{len(created)} appointment slots added.")
+                if skipped:
+                    messages.warning(request, f"{skipped} slots were skipped because they overlap existing appointments.")
+                return redirect('providerDashboard')
+        else:
+            slotForm = AppointmentSlotForm(request.POST)
+            if slotForm.is_valid():
+                slotForm.save(providerProfile)
+                messages.success(request, "Appointment slot added successfully.")
+                return redirect('providerDashboard')
 
     # Filtering parameters
     search = request.GET.get('searchInput', '').strip().lower()
     typeFilter = request.GET.get('typeFilter', '')
     dateFilter = request.GET.get('dateFilter', '')
 
-    # Get all slots for this provider
-    slotsQuerySet = AppointmentSlot.objects.filter(providerUsername=request.user.username)
-    slotsQuerySet = filterNonPastAppointments(slotsQuerySet)
-    filteredSlots = filterAppointments(slotsQuerySet, search, typeFilter, dateFilter)
+    pageSize = getPageSize(request)
+
+    # Get all slots for this provider, one keyset page at a time
+    slotsQuerySet = AppointmentSlot.objects.filter(provider=providerProfile).upcoming()
+    filteredQuerySet = filterAppointmentSlots(slotsQuerySet, search, typeFilter, dateFilter)
+    slotsPage = paginateByKeyset(filteredQuerySet, request.GET.get('after', ''), request.GET.get('before', ''), pageSize)
+    addPageUrls(request, slotsPage)
+    filteredSlots = formatAppointments(slotsPage['rows'])
 
-    # Collect unique types for the filter dropdown
-    types = sorted(set(slot.appointmentType.strip() for slot in slotsQuerySet))
+    # Types for the filter dropdown come from the cached type catalog
+    types = getAppointmentTypes()
 
     return render(request, 'providerDashboard.html', {
         'provider': providerProfile,
         'slots': filteredSlots,
+        'slotsPage': slotsPage,
+        'pageSize': pageSize,
         'slotForm': slotForm,
+        'recurringForm': recurringForm,
         'types': types,
         'searchInput': search,
         'typeFilter': typeFilter,
@@ -211,10 +236,9 @@ def providerDashboard(request):
 @never_cache
 @csrf_protect
 def userDashboard(request):
-    try:
-        # Get provider profile from database via model
-        userProfile = UserProfile.objects.get(user=request.user)
-    except UserProfile.DoesNotExist:
+    # User profile from the session copy resolved at login
+    userProfile = requestRole(request).userProfile
+    if userProfile is None:
         messages.error(request, "Access denied: You are not registered as a user.")
         return redirect('home')
     
@@ -227,25 +251,47 @@ def userDashboard(request):
     bookedSearch = request.GET.get('bookedSearchInput', '').strip().lower()
     bookedTypeFilter = request.GET.get('bookedTypeFilter', '')
 
-    # Booked appointments for the user
-    bookingsQuerySet = Booking.objects.filter(user=request.user).select_related("slot")
-    bookingsQuerySet  = filterNonPastBookings(bookingsQuerySet)
-    bookings = filterBookings(bookingsQuerySet, bookedSearch, bookedTypeFilter)
-
-
-    # Get all appointment slots
-    slotsQuerySet = AppointmentSlot.objects.filter(isBooked=False)
-    slotsQuerySet = filterNonPastAppointments(slotsQuerySet)
-    slots = filterAppointments(slotsQuerySet, search, typeFilter, dateFilter)
+    pageSize = getPageSize(request)
+    bookedAfter = request.GET.get('bookedAfter', '')
+    bookedBefore = request.GET.get('bookedBefore', '')
+    after = request.GET.get('after', '')
+    before = request.GET.get('before', '')
+
+    # Booked appointments for the user (cached per user and filter until a slot or booking changes)
+    def buildBookingsPage():
+        bookingsQuerySet = Booking.objects.filter(user=request.user).select_related("slot").upcoming()
+        bookingsQuerySet = filterBookings(bookingsQuerySet, bookedSearch, bookedTypeFilter)
+        return paginateByKeyset(bookingsQuerySet, bookedAfter, bookedBefore, pageSize, BOOKING_KEYSET_FIELDS)
+    bookingsPage = cachedFragment('bookings', {
+        'search': bookedSearch, 'type': bookedTypeFilter, 'after': bookedAfter, 'before': bookedBefore, 'pageSize': pageSize,
+    }, buildBookingsPage, userId=request.user.id)
+    addPageUrls(request, bookingsPage, 'bookedAfter', 'bookedBefore')
+    bookings = bookingsPage['rows']
+
+    # Get all appointment slots (the open-slot list is the same for every user, so it is cached once per filter)
+    slotsQuerySet = AppointmentSlot.objects.filter(isBooked=False).upcoming()
+    def buildSlotsPage():
+        filteredQuerySet = filterAppointmentSlots(slotsQuerySet, search, typeFilter, dateFilter)
+        page = paginateByKeyset(filteredQuerySet, after, before, pageSize)
+        page['rows'] = formatAppointments(page['rows'])
+        return page
+    slotsPage = cachedFragment('openSlots', {
+        'search': search, 'type': typeFilter, 'date': dateFilter, 'after': after, 'before': before, 'pageSize': pageSize,
+    }, buildSlotsPage)
+    addPageUrls(request, slotsPage)
+    slots = slotsPage['rows']
 
     # Get all types for dropdown
-    types = sorted(set(slot.appointmentType.strip() for slot in slotsQuerySet))
+    types = getAppointmentTypes()
 
     # Render template
     return render(request, 'userDashboard.html', {
         'canceledMsgs': canceledMsgs,
         'bookings': bookings,
+        'bookingsPage': bookingsPage,
         'slots': slots,
+        'slotsPage': slotsPage,
+        'pageSize': pageSize,
         'types': types,
         'searchInput': search,
         'typeFilter': typeFilter,
@@ -255,6 +301,23 @@ def userDashboard(request):
     })
 
 
+@never_cache
+@userRequired
+def availabilityCalendar(request):
+    # Month/week grid of open and booked slots per day and type; each cell links to the filtered slot list
+    params = getCalendarParams(request)
+    counts = cachedFragment('availability', {
+        'first': params['firstDate'].isoformat(), 'last': params['lastDate'].isoformat(), 'type': params['typeFilter'],
+    }, lambda: availabilityCounts(params['firstDate'], params['lastDate'], params['typeFilter']))
+    month = params['start'].month if params['view'] == 'month' else None
+
+    return render(request, 'availabilityCalendar.html', dict(params,
+        weeks=buildCalendar(params['firstDate'], params['lastDate'], counts, month),
+        weekdays=['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+        types=getAppointmentTypes(),
+    ))
+
+
 @never_cache
 @csrf_protect
 def adminDashboard(request):
@@ -266,42 +329,26 @@ def adminDashboard(request):
     viewMode = request.GET.get('view', 'appointments')
 
     if request.method == "POST":
-        # Handle appointment cancellation
+        # Handle appointment cancellation (one slotId from a row's Cancel button, or many from the selected checkboxes)
         if viewMode == 'appointments':
-            slotID = request.POST.get("slotId")
-            slot = get_object_or_404(AppointmentSlot, id=slotID)
-            booking = Booking.objects.filter(slot=slot).first()
-            formattedStartTime = convertFromMilitaryTime(slot.startTime)
-            formattedEndTime = convertFromMilitaryTime(slot.endTime)
-            formattedDate = slot.date.strftime('%m/%d/%Y')
-            providerProfile = ServiceProvider.objects.filter(user__username=slot.providerUsername).first()
-            if booking:
-                userProfile = UserProfile.objects.filter(user=booking.user).first()
-                # User cancelation message
-                if userProfile:
-                    userCancelMsg = (f"Your appointment '{slot.appointmentName}' with {slot.providerFirstName} {slot.providerLastName} "f"on {formattedDate} at {formattedStartTime}-{formattedEndTime} was canceled by an administrator.")
-                    appendCancelMessage(userProfile, userCancelMsg)
-                # Provider cancelation message
-                if providerProfile:
-                    msg_provider = (f"Your appointment '{slot.appointmentName}' with {booking.user.get_full_name()} "f"on {formattedDate} at {formattedStartTime}-{formattedEndTime} was canceled by an administrator.")
-                    appendCancelMessage(providerProfile, msg_provider)
-                # Delete/remove booking
-                booking.delete()
+            slotIds = request.POST.getlist("slotId")
+            canceled = cancelSlots(slotIds)
+            if canceled == 1:
+                messages.success(request, "Appointment canceled and removed.")
+            elif canceled:
+                messages.success(request, f"{canceled} appointments canceled and removed.")
             else:
-                # If slot was not booked and canceled, just notify provider
-                if providerProfile:
-                    msg_provider = (f"Your appointment '{slot.appointmentName}' "f"on {formattedDate} at {formattedStartTime}-{formattedEndTime} was canceled by an administrator.")
-                    appendCancelMessage(providerProfile, msg_provider)
-            # Delete/appointment slot
-            slot.delete()
-            messages.success(request, "Appointment canceled and removed.")
+                messages.error(request, "No appointments selected.")
             return redirect(f'{request.path}?view=appointments')
        
-        # Handle user/provider removal
+        # Handle user/provider removal (one or many usernames)
         elif viewMode == 'users':
-            username = request.POST.get("username")
-            if deleteUserAndProfile(username):
+            usernames = request.POST.getlist("username")
+            deleted = deleteAccounts(usernames)
+            if deleted == 1:
                 messages.success(request, "User/Provider account deleted.")
+            elif deleted:
+                messages.success(request, f"{deleted} User/Provider accounts deleted.")
             else:
                 messages.error(request, "User not found.")
             return redirect(f'{request.path}?view=users')
@@ -310,37 +357,71 @@ def adminDashboard(request):
         search = request.GET.get('searchInput', '')
         typeFilter = request.GET.get('typeFilter', '')
         dateFilter = request.GET.get('dateFilter', '')
+        pageSize = getPageSize(request)
+        after = request.GET.get('after', '')
+        before = request.GET.get('before', '')
         slots = AppointmentSlot.objects.all()
-        items = filterAppointments(slots, search, typeFilter, dateFilter)
-        # Set creates a list of unique items no matter the number of times they appear
-        types = sorted(set(slot.appointmentType.strip() for slot in slots))
+        filteredQuerySet = filterAppointmentSlots(slots, search, typeFilter, dateFilter)
+        # Open on the first upcoming appointment; earlier (past) appointments are on the previous pages
+        startAt = None
+        if not (after or before):
+            startAt = filteredQuerySet.upcoming().order_by(*SLOT_KEYSET_FIELDS).first()
+        itemsPage = paginateByKeyset(filteredQuerySet, after, before, pageSize, startAt=startAt)
+        addPageUrls(request, itemsPage)
+        items = formatAppointments(itemsPage['rows'])
+        types = getAppointmentTypes()
         context = {
             'viewMode': 'appointments',
             'items': items,
+            'itemsPage': itemsPage,
+            'pageSize': pageSize,
             'types': types,
             'searchInput': search,
             'typeFilter': typeFilter,
             'dateFilter': dateFilter,
         }
         return render(request, 'adminDashboard.html', context)
+
+    elif viewMode == 'analytics':
+        # Aggregates over appointments in the chosen range (default: the last 30 days), cached for ANALYTICS_CACHE_TIMEOUT
+        endDate = parseDate(request.GET.get('endDate', '')) or date.today()
+        startDate = parseDate(request.GET.get('startDate', '')) or endDate - timedelta(days=30)
+        if startDate > endDate:
+            startDate, endDate = endDate, startDate
+        context = {
+            'viewMode': 'analytics',
+            'analytics': cachedAnalytics(startDate, endDate, lambda: adminAnalytics(startDate, endDate)),
+            'startDate': startDate,
+            'endDate': endDate,
+        }
+        return render(request, 'adminDashboard.html', context)
     
     else:
         userSearchInput = request.GET.get('userSearchInput', '')
         userTypeFilter = request.GET.get('userTypeFilter', '')
-        allUserProfiles = UserProfile.objects.select_related('user').all()
-        allProviderProfiles = ServiceProvider.objects.select_related('user').all()
-        # utilize filter (will return filtered user and provider profiles based on results from search and filter bar in app)
-        allUserProfiles, allProviderProfiles = filterUsers(
-            allUserProfiles, allProviderProfiles,
+        pageSize = getPageSize(request)
+        # Search and type filter run in SQL; each list is paged on its own
+        userProfiles, providerProfiles = filterUsers(
+            UserProfile.objects.all(), ServiceProvider.objects.all(),
             search=userSearchInput,
             typeFilter=userTypeFilter
         )
-        slots = AppointmentSlot.objects.all()
-        types = sorted(set(slot.appointmentType.strip() for slot in slots))
+        userPage = paginateByKeyset(userProfiles, request.GET.get('userAfter', ''), request.GET.get('userBefore', ''), pageSize, fields=PROFILE_KEYSET_FIELDS)
+        addPageUrls(request, userPage, 'userAfter', 'userBefore')
+        providerPage = paginateByKeyset(providerProfiles, request.GET.get('providerAfter', ''), request.GET.get('providerBefore', ''), pageSize, fields=PROFILE_KEYSET_FIELDS)
+        addPageUrls(request, providerPage, 'providerAfter', 'providerBefore')
+        types = getAppointmentTypes()
+        reportJobs = ReportJob.objects.filter(requestedBy=request.user).order_by('-createdAt')[:10]
         context = {
             'viewMode': 'users',
-            'allUserProfiles': allUserProfiles,
-            'allProviderProfiles': allProviderProfiles,
+            'allUserProfiles': userPage['rows'],
+            'allProviderProfiles': providerPage['rows'],
+            'userPage': userPage,
+            'providerPage': providerPage,
+            'accountCounts': countAccounts(userSearchInput, userTypeFilter),
+            'pageSize': pageSize,
+            'reportJobs': reportJobs,
+            'reportJobsActive': any(job.status in ('pending', 'running') for job in reportJobs),
             'userSearchInput': userSearchInput,
             'userTypeFilter': userTypeFilter,
             'types': types,
@@ -350,30 +431,13 @@ def adminDashboard(request):
 @userRequired
 @csrf_protect
 def bookAppointment(request, slotId):
-    slot = get_object_or_404(AppointmentSlot, id=slotId, isBooked=False)
-
     if request.method == "POST":
-        # Check for conflicting appointments for this user
-        userBookings = Booking.objects.filter(user=request.user, slot__date=slot.date)
-        for booking in userBookings:
-            bookedSlot = booking.slot
-            # If times overlap, block booking
-            if (slot.startTime < bookedSlot.endTime and slot.endTime > bookedSlot.startTime):
-                messages.error(
-                    request,
-                    f"Conflicting appointment: You already have '{bookedSlot.appointmentName}' from "
-                    f"{convertFromMilitaryTime(bookedSlot.startTime)} to {convertFromMilitaryTime(bookedSlot.endTime)} on {bookedSlot.date.strftime('%m/%d/%Y')}."
-                )
-                return redirect('userDashboard') 
-
-        # Double-check that slot is still available
-        if slot.isBooked:
-            messages.error(request, "Sorry, this appointment has already been booked.")
+        # Claim, conflict check and booking all happen in one transaction (see website/booking.py)
+        try:
+            bookSlot(slotId, request.user)
+        except BookingError as e:
+            messages.error(request, str(e))
             return redirect('userDashboard')
-
-        slot.isBooked = True
-        slot.save()
-        Booking.objects.create(slot=slot, user=request.user)
         messages.success(request, "Appointment booked successfully!")
         return redirect('userDashboard')
     else:
@@ -381,20 +445,18 @@ def bookAppointment(request, slotId):
         return redirect('userDashboard') 
 
 def appendCancelMessage(profile, message):
+    # Single insert into the notification table; the profile row itself is never rewritten
     if profile:
-        import json
-        msgs = json.loads(profile.canceledMsgs)
-        msgs.append(message)
-        profile.canceledMsgs = json.dumps(msgs)
-        profile.save()
+        Notification.objects.create(recipient_id=profile.user_id, text=message)
 
 @csrf_protect
 def cancelAppointment(request, slotId):
-    slot = get_object_or_404(AppointmentSlot, id=slotId)
-    booking = Booking.objects.filter(slot=slot).first()
+    # Booking, booked user and provider come back with the slot in one joined query
+    slot = get_object_or_404(AppointmentSlot.objects.select_related('booking__user', 'provider__user'), id=slotId)
+    booking = getattr(slot, 'booking', None)
 
-    isProvider = hasattr(request.user, 'serviceprovider') and slot.providerUsername == request.user.username
-    isUser = booking and hasattr(request.user, 'userprofile') and booking.user == request.user
+    isProvider = slot.provider is not None and slot.provider.user_id == request.user.id
+    isUser = booking and requestRole(request).isUser and booking.user == request.user
 
     if not (isUser or isProvider):
         messages.error(request, "Access denied: This page is for registered users or providers only.")
@@ -406,22 +468,23 @@ def cancelAppointment(request, slotId):
 
     if isUser:
         # User cancels: add message for provider, remove booking
-        providerProfile = ServiceProvider.objects.filter(user__username=slot.providerUsername).first()
+        providerProfile = slot.provider
         msg = f"{booking.user.get_full_name()} canceled '{slot.appointmentName}' with you on {formattedDate} at {formattedStartTime}-{formattedEndTime}."
         appendCancelMessage(providerProfile, msg)
+        Cancellation.forSlot(slot, 'user').save()
         booking.delete()
         slot.isBooked = False
-        slot.save()
+        slot.save(update_fields=['isBooked'])
         messages.success(request, "Appointment canceled.")
         return redirect("userDashboard")
     
     elif isProvider:
         # Provider cancels: add message for user if booked, remove booking if exists, always remove slot
         if booking:
-            userProfile = UserProfile.objects.filter(user=booking.user).first()
             msg = f"Your appointment '{slot.appointmentName}' with {slot.providerFirstName} {slot.providerLastName} on {formattedDate} at {formattedStartTime}-{formattedEndTime} was canceled by {slot.providerFirstName}."
-            appendCancelMessage(userProfile, msg)
+            Notification.objects.create(recipient_id=booking.user_id, text=msg)
             booking.delete()
+        Cancellation.forSlot(slot, 'provider', booking is not None).save()
         slot.delete()
         messages.success(request, "Appointment slot canceled and removed.")
         return redirect("providerDashboard")
@@ -476,3 +539,44 @@ def downloadAllProvidersReport(request):
         response = generateAllProvidersReport(startDate, endDate, appointmentType)
         return response
     return redirect('adminDashboard')
+
+@never_cache
+@adminRequired
+@csrf_protect
+def queueReport(request):
+    # Queue a report for the background worker instead of building it inside the request
+    if request.method == "POST":
+        form = ReportJobForm(request.POST)
+        if form.is_valid():
+            form.save(request.user)
+            messages.success(request, "Report queued. Download it from Report Jobs once it is done.")
+        else:
+            messages.error(request, "Please provide a valid report type and date range.")
+    return redirect(f"{reverse('adminDashboard')}?view=users")
+
+@never_cache
+@adminRequired
+def reportJobStatus(request):
+    # Polled by the admin dashboard while any report job is still pending or running
+    jobs = []
+    for job in ReportJob.objects.filter(requestedBy=request.user).order_by('-createdAt')[:10]:
+        jobs.append({
+            'id': job.id,
+            'reportType': job.get_reportType_display(),
+            'username': job.username,
+            'dateRange': f"{job.startDate.strftime('%m-%d-%Y')} to {job.endDate.strftime('%m-%d-%Y')}",
+            'status': job.status,
+            'rowCount': job.rowCount,
+            'error': job.error,
+            'downloadUrl': reverse('downloadReportJob', args=[job.id]) if job.status == 'done' else '',
+        })
+    return JsonResponse({'jobs': jobs})
+
+@never_cache
+@adminRequired
+def downloadReportJob(request, jobId):
+    job = get_object_or_404(ReportJob, id=jobId, requestedBy=request.user, status='done')
+    path = job.filePath()
+    if not path.exists():
+        raise Http404("Report file is no longer available.")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=job.fileName, content_type='text/csv')